@@ -0,0 +1,121 @@
+"""
+Age/gender extraction from post and comment text. Only the standard library
+is imported up front; NumPy and pandas load when the batch variants are used.
+"""
+import re
+
+# Stated ages outside this range are treated as noise
+MIN_AGE, MAX_AGE = 16, 80
+
+# Simple patterns that are most likely to work, in priority order
+AGE_GENDER_PATTERNS = [
+    r'\b([mf])[,\s]*(\d{2})\b',  # M 25, F,30
+    r'\b(\d{2})[,\s]*([mf])\b',  # 25 M, 30,F
+    r'\bi.?m\s+(\d{2})\s+(male|female)\b',  # I'm 25 male
+    r'\bi.?m\s+a\s+(\d{2})\s+year\s+old\s+(male|female)\b'  # I'm a 25 year old male
+]
+
+# One alternation wrapped in a lookahead so a single scan reports the first
+# match of every pattern, even where matches of different patterns overlap
+_AGE_GENDER_SCAN = re.compile(
+    '(?=' + '|'.join(f'(?:{pattern})' for pattern in AGE_GENDER_PATTERNS) + ')'
+)
+# Every pattern needs two adjacent digits, so texts without them are skipped
+_HAS_TWO_DIGITS = re.compile(r'\d\d')
+
+
+def _scan_age_gender(text_lower):
+    """Single pass over lowercased text, honouring the pattern priority order"""
+    if not _HAS_TWO_DIGITS.search(text_lower):
+        return None, None
+
+    seen = 0  # bitmask of patterns whose first match has been checked
+    best = None
+    best_priority = len(AGE_GENDER_PATTERNS)
+
+    for match in _AGE_GENDER_SCAN.finditer(text_lower):
+        priority = (match.lastindex - 1) // 2
+        bit = 1 << priority
+        if seen & bit:
+            continue
+        seen |= bit
+
+        if priority < best_priority:
+            first, second = match.group(2 * priority + 1, 2 * priority + 2)
+            if priority == 0:
+                gender, age = first, int(second)
+            else:
+                gender, age = second, int(first)
+
+            if MIN_AGE <= age <= MAX_AGE:
+                best = ('Male' if gender[0] == 'm' else 'Female', age)
+                best_priority = priority
+
+        # Stop once no higher priority pattern can still match further on
+        higher = (1 << best_priority) - 1
+        if best is not None and seen & higher == higher:
+            break
+
+    return best if best is not None else (None, None)
+
+
+def extract_age_gender(text):
+    """Extract gender and age from post text"""
+    if not text:
+        return None, None
+
+    return _scan_age_gender(text.lower())
+
+
+def extract_age_gender_batch(texts):
+    """Extract gender and age from many texts, returned as (genders, ages) arrays"""
+    import numpy as np
+
+    genders = []
+    ages = []
+    scan = _scan_age_gender
+
+    for text in texts:
+        if text and isinstance(text, str):
+            gender, age = scan(text.lower())
+        else:
+            gender, age = None, None
+        genders.append(gender)
+        ages.append(age)
+
+    return np.array(genders, dtype=object), np.array(ages, dtype=object)
+
+
+def extract_age_gender_series(texts):
+    """
+    Vectorized variant over a pandas Series of texts.
+    Returns a DataFrame with 'gender' and a nullable Int64 'age' column.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Keep object dtype so lowercasing and matching follow Python's str and re
+    texts = pd.Series(texts, dtype=object)
+    texts_lower = texts.where(texts.map(lambda value: isinstance(value, str)), '').str.lower()
+    genders = pd.Series(None, index=texts_lower.index, dtype=object)
+    ages = pd.Series(pd.NA, index=texts_lower.index, dtype='Int64')
+    unresolved = pd.Series(True, index=texts_lower.index)
+
+    for priority, pattern in enumerate(AGE_GENDER_PATTERNS):
+        candidates = texts_lower[unresolved]
+        if candidates.empty:
+            break
+
+        found = candidates.str.extract(pattern).dropna()
+        if priority == 0:
+            gender, age = found[0], found[1].astype(int)
+        else:
+            gender, age = found[1], found[0].astype(int)
+
+        valid = age.between(MIN_AGE, MAX_AGE)
+        matched = valid[valid].index
+        genders.loc[matched] = np.where(gender[valid].str[0] == 'm', 'Male', 'Female')
+        ages.loc[matched] = age[valid]
+        unresolved.loc[matched] = False
+
+    return pd.DataFrame({'gender': genders, 'age': ages})
@@ -0,0 +1,212 @@
+"""
+Precomputed summary cube over posts for the demographic dashboards.
+
+Posts are counted per (day, flair, gender, age bucket, inferred) with
+score and comment sums plus age sums and bounds, all of which merge by
+addition or min/max. `inferred` separates ages and genders filled in from
+the author's profile from those stated in the post itself. A cube is built
+chunk by chunk while cleaning (or from any posts frame), updated
+incrementally with new posts, and saved as a small Parquet file next to the
+cleaned data; value counts, age ranges and daily series are then answered
+from a few thousand cube rows instead of a full scan.
+
+Usage: python aggregate_cube.py <cube.parquet> <cleaned_posts> [...]
+       adds cleaned posts files to the cube, skipping files already in it
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+DIMENSIONS = ['day', 'flair', 'gender', 'age_bucket', 'inferred']
+SUM_MEASURES = ['posts', 'unique_posts', 'score_sum', 'comments_sum', 'age_sum', 'age_count']
+MIN_MEASURES = ['age_min']
+MAX_MEASURES = ['age_max']
+MEASURES = SUM_MEASURES + MIN_MEASURES + MAX_MEASURES
+
+AGE_BINS = [16, 18, 25, 35, 45, 55, 65, 81]
+AGE_LABELS = ['16-17', '18-24', '25-34', '35-44', '45-54', '55-64', '65-80']
+UNKNOWN = 'Unknown'
+
+
+def cube_rows(posts):
+    """Cube rows for a frame of posts, raw scraper output or cleaned (age -1 = missing)"""
+    day = pd.to_datetime(posts['created_date'], format='mixed').dt.normalize()
+    age = pd.to_numeric(posts['age'], errors='coerce').astype('float64')
+    age = age.where(age >= 0)
+    bucket = pd.cut(age, AGE_BINS, right=False, labels=AGE_LABELS).astype(object).fillna(UNKNOWN)
+    if 'duplicate_cluster_id' in posts.columns:
+        unique = (posts['duplicate_cluster_id'].astype(object) == posts['post_id'].astype(object)).to_numpy()
+    else:
+        unique = np.ones(len(posts), dtype=bool)
+    if 'age_gender_inferred' in posts.columns:
+        inferred = posts['age_gender_inferred'].astype('boolean').fillna(False).to_numpy(dtype=bool)
+    else:
+        inferred = np.zeros(len(posts), dtype=bool)
+
+    frame = pd.DataFrame({
+        'day': day.to_numpy(),
+        'flair': posts['flair'].astype(object).fillna('No Flair').to_numpy(),
+        'gender': posts['gender'].astype(object).fillna(UNKNOWN).to_numpy(),
+        'age_bucket': bucket.to_numpy(),
+        'inferred': inferred,
+        'posts': 1,
+        'unique_posts': unique.astype(np.int64),
+        'score_sum': pd.to_numeric(posts['score'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+        'comments_sum': pd.to_numeric(posts['num_comments'], errors='coerce').fillna(0).to_numpy(dtype=np.int64),
+        'age_sum': age.fillna(0).to_numpy(),
+        'age_count': age.notna().to_numpy(dtype=np.int64),
+        'age_min': age.to_numpy(),
+        'age_max': age.to_numpy()
+    })
+    return _collapse(frame)
+
+
+def _collapse(frame):
+    """Merge rows with the same dimensions"""
+    aggregations = {**{m: 'sum' for m in SUM_MEASURES}, **{m: 'min' for m in MIN_MEASURES},
+                    **{m: 'max' for m in MAX_MEASURES}}
+    return frame.groupby(DIMENSIONS, sort=True, dropna=False).agg(aggregations).reset_index()
+
+
+def _derive(result):
+    """Means from the summed measures"""
+    result['mean_score'] = result['score_sum'] / result['posts']
+    result['mean_comments'] = result['comments_sum'] / result['posts']
+    result['mean_age'] = result['age_sum'] / result['age_count'].where(result['age_count'] > 0)
+    return result
+
+
+class AggregateCube:
+    """
+    Mergeable counts, sums and age bounds per (day, flair, gender, age bucket,
+    inferred); pass inferred=False to a query to count stated ages only.
+
+    `sources` names the inputs already added (see add_file), so re-running
+    an update does not count the same file twice.
+    """
+
+    def __init__(self, frame=None, sources=None):
+        self.frame = frame if frame is not None else pd.DataFrame(columns=DIMENSIONS + MEASURES)
+        self.sources = dict(sources or {})
+
+    def __len__(self):
+        return len(self.frame)
+
+    def add(self, posts):
+        """Add a frame (or cleaning chunk) of posts"""
+        if len(posts):
+            self.merge(cube_rows(posts))
+
+    def merge(self, other):
+        """Add another cube or frame of cube rows"""
+        rows = other.frame if isinstance(other, AggregateCube) else other
+        if isinstance(other, AggregateCube):
+            self.sources.update(other.sources)
+        self.frame = _collapse(pd.concat([self.frame, rows], ignore_index=True)) if len(self.frame) else rows
+
+    def add_file(self, path, chunksize=200_000):
+        """Add a cleaned posts CSV or Parquet file unless it is already in the cube; returns True if added"""
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime]
+        name = os.path.abspath(path)
+        if self.sources.get(name) == signature:
+            return False
+        if name in self.sources:
+            raise ValueError(f"{path} changed since it was added to the cube; rebuild the cube instead")
+
+        columns = ['post_id', 'created_date', 'flair', 'gender', 'age', 'age_gender_inferred', 'score',
+                   'num_comments', 'duplicate_cluster_id']
+        if path.endswith('.parquet') or os.path.isdir(path):
+            from parquet_io import iter_parquet_chunks
+            chunks = iter_parquet_chunks(path, batch_size=chunksize)
+        else:
+            header = pd.read_csv(path, nrows=0).columns
+            chunks = pd.read_csv(path, usecols=[c for c in columns if c in header], chunksize=chunksize)
+        for chunk in chunks:
+            self.add(chunk)
+        self.sources[name] = signature
+        return True
+
+    def query(self, by=(), start=None, end=None, **filters):
+        """
+        Measures summed over everything but `by`, for days in [start, end] and
+        rows matching filters (a value or list of values per dimension), with
+        mean_score, mean_comments and mean_age
+        """
+        frame = self.frame
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (frame['day'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (frame['day'] <= pd.Timestamp(end)).to_numpy()
+        for dimension, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= frame[dimension].isin(values).to_numpy()
+        frame = frame[mask]
+
+        aggregations = {**{m: 'sum' for m in SUM_MEASURES}, **{m: 'min' for m in MIN_MEASURES},
+                        **{m: 'max' for m in MAX_MEASURES}}
+        if by:
+            result = frame.groupby(list(by), sort=True).agg(aggregations)
+        else:
+            result = frame.agg(aggregations).to_frame().T
+        return _derive(result)
+
+    def value_counts(self, dimension, known_age=False, **filters):
+        """Posts per value of a dimension, largest first; known_age keeps posts with an age"""
+        if known_age:
+            filters['age_bucket'] = AGE_LABELS
+        return self.query(by=[dimension], **filters)['posts'].sort_values(ascending=False)
+
+    def age_range(self, **filters):
+        """(youngest, oldest) stated age"""
+        result = self.query(**filters)
+        return result['age_min'].iloc[0], result['age_max'].iloc[0]
+
+    def save(self, path):
+        """Write the cube as Parquet with the source list in its metadata, atomically"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(self.frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b'cube_sources': json.dumps(self.sources).encode()})
+        temp_path = path + '.tmp'
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The cube saved at path, or an empty cube if there is none yet"""
+        if not os.path.exists(path):
+            return cls()
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        sources = json.loads((table.schema.metadata or {}).get(b'cube_sources', b'{}'))
+        frame = table.to_pandas()
+        if 'inferred' not in frame.columns:
+            # Cubes saved before inferred ages were tracked hold stated ones only
+            frame.insert(DIMENSIONS.index('inferred'), 'inferred', False)
+        return cls(frame, sources)
+
+
+def cube_path_for(cleaned_path):
+    """Where the cube of a cleaned posts file is written: alongside it, with a _cube suffix"""
+    base = cleaned_path.rstrip(os.sep)
+    for extension in ('.csv', '.parquet'):
+        if base.endswith(extension):
+            base = base[:-len(extension)]
+    return f"{base}_cube.parquet"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__.strip().split('Usage: ')[-1])
+    cube = AggregateCube.load(sys.argv[1])
+    for path in sys.argv[2:]:
+        added = cube.add_file(path)
+        print(f"{path}: {'added' if added else 'already in the cube'}")
+    cube.save(sys.argv[1])
+    print(f"{sys.argv[1]}: {len(cube):,} cube rows, {int(cube.frame['posts'].sum()):,} posts")
@@ -0,0 +1,137 @@
+"""
+Per-author age/gender profiles, so an author who states "M 28" once is
+resolved in all their other posts and comments too
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from age_gender import MAX_AGE, MIN_AGE
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+# Cached lookups of authors with no stored profile
+_MISSING = object()
+
+
+class AuthorProfileCache:
+    """
+    First confident age/gender per author, with the time it was stated.
+
+    Profiles live in SQLite (use ':memory:' for a throwaway cache) behind an
+    in-memory LRU of `capacity` authors, which also remembers authors with
+    no profile so repeated unresolved rows never touch the database. New
+    profiles are committed on checkpoint() or close(), like CrawlState.
+    Thread-safe.
+    """
+
+    def __init__(self, path='author_profiles.sqlite', capacity=100_000):
+        self.path = path
+        self.capacity = capacity
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS profiles (
+                author TEXT PRIMARY KEY,
+                gender TEXT NOT NULL,
+                age INTEGER NOT NULL,
+                stated_utc REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+
+    def _cache(self, author, profile):
+        self._lru[author] = profile
+        self._lru.move_to_end(author)
+        if len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def _get(self, author):
+        """(gender, age, stated_utc) or None; call with the lock held"""
+        profile = self._lru.get(author)
+        if profile is not None:
+            self.hits += 1
+            self._lru.move_to_end(author)
+            return None if profile is _MISSING else profile
+
+        self.misses += 1
+        profile = self._conn.execute(
+            'SELECT gender, age, stated_utc FROM profiles WHERE author = ?', (author,)).fetchone()
+        self._cache(author, profile or _MISSING)
+        return profile
+
+    def get(self, author):
+        with self._lock:
+            return self._get(author)
+
+    def remember(self, author, gender, age, stated_utc):
+        """Store a stated age/gender unless the author already has a profile; returns True if stored"""
+        if not author or author == '[deleted]' or gender is None or age is None:
+            return False
+        with self._lock:
+            if self._get(author) is not None:
+                return False
+            profile = (gender, int(age), stated_utc)
+            self._conn.execute(
+                'INSERT OR IGNORE INTO profiles (author, gender, age, stated_utc) VALUES (?, ?, ?, ?)',
+                (author, *profile))
+            self._cache(author, profile)
+            return True
+
+    def resolve(self, author, created_utc):
+        """
+        Profile gender and age as of created_utc, or (None, None). Ages that
+        shift outside the extractor's MIN_AGE..MAX_AGE range are not used.
+        """
+        if not author or author == '[deleted]':
+            return None, None
+        profile = self.get(author)
+        if profile is None:
+            return None, None
+        gender, age, stated_utc = profile
+        age += int((created_utc - stated_utc) / SECONDS_PER_YEAR)
+        if not MIN_AGE <= age <= MAX_AGE:
+            return None, None
+        return gender, age
+
+    def fill(self, record, author_key, gender_key, age_key, date_key, inferred_key):
+        """
+        Remember a record's own age/gender, or fill them in from the author's
+        profile if it has none and set record[inferred_key] to True. Returns
+        True if the record was filled.
+        """
+        author = record.get(author_key)
+        created_utc = datetime.strptime(record[date_key], '%Y-%m-%d %H:%M:%S').replace(
+            tzinfo=timezone.utc).timestamp()
+        if record.get(age_key) is not None:
+            self.remember(author, record.get(gender_key), record[age_key], created_utc)
+            return False
+
+        gender, age = self.resolve(author, created_utc)
+        if age is None:
+            return False
+        record[gender_key] = gender
+        record[age_key] = age
+        record[inferred_key] = True
+        with self._lock:
+            self.fills += 1
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM profiles').fetchone()[0]
+
+    def checkpoint(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
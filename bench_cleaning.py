@@ -0,0 +1,124 @@
+"""
+Benchmark the chunked cleaning pipeline against the original whole-file
+cleaning on a synthetic posts CSV. Each run happens in a child process so
+its peak RSS can be measured on its own.
+
+Usage: python bench_cleaning.py [n_rows]
+"""
+import importlib.util
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def load_cleaning_module():
+    """Import 'data cleaning.py' despite the space in its name"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data cleaning.py')
+    spec = importlib.util.spec_from_file_location('data_cleaning', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_synthetic_posts(path, n_rows, chunk_rows=200_000, seed=7):
+    """Write a posts CSV in chunks, with ~10% duplicate IDs and missing values"""
+    rng = np.random.default_rng(seed)
+    flairs = np.array(['Budgeting', 'Investing', 'Debt', 'Retirement', 'Taxes', None], dtype=object)
+    written = 0
+    while written < n_rows:
+        n = min(chunk_rows, n_rows - written)
+        ids = rng.integers(0, int(n_rows * 0.9), n) + 36 ** 6
+        created = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 180 * 86400, n), unit='s')
+        chunk = pd.DataFrame({
+            'post_id': [np.base_repr(value, 36).lower() for value in ids],
+            'title': 'Should I pay off my car loan or invest?',
+            'text': np.where(rng.random(n) < 0.2, None, 'Long post body ' * 20),
+            'author': [f"user{value}" for value in rng.integers(0, 50_000, n)],
+            'score': rng.integers(0, 5000, n),
+            'upvote_ratio': rng.random(n).round(2),
+            'num_comments': rng.integers(0, 500, n),
+            'created_date': created.strftime('%Y-%m-%d %H:%M:%S'),
+            'url': 'https://www.reddit.com/r/personalfinance/',
+            'permalink': 'https://reddit.com/r/personalfinance/comments/x/',
+            'flair': flairs[rng.integers(0, len(flairs), n)],
+            'gender': np.where(rng.random(n) < 0.8, None, 'Male'),
+            'age': np.where(rng.random(n) < 0.8, np.nan, rng.integers(16, 80, n)),
+            'has_selftext': True,
+            'text_length': rng.integers(10, 2000, n),
+        })
+        chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n
+
+
+def legacy_clean(input_path, output_path):
+    """The original whole-file steps from data cleaning.py"""
+    df = pd.read_csv(input_path)
+    df['gender'] = df['gender'].fillna('Unknown')
+    df['age'] = df['age'].fillna(-1)
+    df['flair'] = df['flair'].fillna('No Flair')
+    df['created_date'] = pd.to_datetime(df['created_date'])
+    df.drop_duplicates(subset=['post_id'], inplace=True)
+    df.to_csv(output_path, index=False)
+    return len(df)
+
+
+def peak_rss_mib():
+    """Peak RSS of this process image; VmHWM is reset on exec, unlike ru_maxrss"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, input_path, output_path):
+    """Run one cleaning pass and print its seconds and peak RSS (MiB)"""
+    start = time.perf_counter()
+    if mode == 'legacy':
+        legacy_clean(input_path, output_path)
+    else:
+        load_cleaning_module().clean_posts(input_path, output_path)
+    elapsed = time.perf_counter() - start
+    peak_mib = peak_rss_mib()
+    print(f"{elapsed} {peak_mib}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(*sys.argv[2:5])
+        return
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'posts.csv')
+        print(f"Writing synthetic CSV with {n_rows:,} rows...")
+        write_synthetic_posts(input_path, n_rows)
+        print(f"Input size: {os.path.getsize(input_path) / 2**20:,.0f} MiB")
+
+        outputs = {}
+        for mode in ('legacy', 'chunked'):
+            output_path = os.path.join(tmp, f"{mode}.csv")
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode, input_path, output_path],
+                capture_output=True, text=True, check=True)
+            elapsed, peak_mib = map(float, result.stdout.split()[-2:])
+            print(f"{mode:<8} {elapsed:7.2f}s  {n_rows / elapsed:12,.0f} rows/sec  peak RSS {peak_mib:8,.0f} MiB")
+            outputs[mode] = pd.read_csv(output_path, usecols=['post_id', 'age', 'gender'])
+
+        legacy, chunked = outputs['legacy'], outputs['chunked']
+        assert legacy['post_id'].tolist() == chunked['post_id'].tolist(), "cleaned IDs differ"
+        assert (legacy['age'] == chunked['age']).all(), "cleaned ages differ"
+        print(f"Both pipelines kept the same {len(chunked):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Dashboard queries answered by rescanning a posts CSV versus loading and
+querying its summary cube.
+
+Usage: python bench_cube.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from aggregate_cube import AggregateCube
+from bench_formats import DATE_FORMAT, synthetic_posts, timed
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    posts = synthetic_posts(n_rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'posts.csv')
+        cube_path = os.path.join(tmp, 'posts_cube.parquet')
+        posts.to_csv(csv_path, index=False, date_format=DATE_FORMAT)
+
+        def build():
+            cube = AggregateCube()
+            cube.add_file(csv_path)
+            cube.save(cube_path)
+            return cube
+
+        print("build cube from the CSV")
+        cube = timed('build', build, repeat=1)
+        print(f"{n_rows:,} posts -> {len(cube):,} cube rows")
+
+        def scan(columns):
+            frame = pd.read_csv(csv_path, usecols=columns)
+            return frame[frame['age'] >= 0]
+
+        queries = [
+            ("gender counts, stated age",
+             lambda: scan(['gender', 'age'])['gender'].value_counts(),
+             lambda: AggregateCube.load(cube_path).value_counts('gender', known_age=True)),
+            ("age range",
+             lambda: scan(['age'])['age'].agg(['min', 'max']),
+             lambda: AggregateCube.load(cube_path).age_range()),
+            ("daily posts and mean score, one flair",
+             lambda: pd.read_csv(csv_path, usecols=['created_date', 'flair', 'score'], parse_dates=['created_date'])
+             .query("flair == 'Debt'").groupby(pd.Grouper(key='created_date', freq='D'))['score'].agg(['size', 'mean']),
+             lambda: AggregateCube.load(cube_path).query(by=['day'], flair='Debt')[['posts', 'mean_score']]),
+        ]
+
+        for name, scan_query, cube_query in queries:
+            print(name)
+            timed('csv scan', scan_query)
+            timed('cube', cube_query)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark the compiled age/gender extractor against the original
+per-pattern implementation on a synthetic corpus.
+
+Usage: python bench_extraction.py [n_texts]
+"""
+import random
+import re
+import sys
+import time
+
+import pandas as pd
+
+import age_gender
+
+
+def legacy_extract_age_gender(text):
+    """The original implementation, kept verbatim as the baseline"""
+    if not text:
+        return None, None
+
+    text_lower = text.lower()
+
+    patterns = [
+        r'\b([mf])[,\s]*(\d{2})\b',
+        r'\b(\d{2})[,\s]*([mf])\b',
+        r'\bi.?m\s+(\d{2})\s+(male|female)\b',
+        r'\bi.?m\s+a\s+(\d{2})\s+year\s+old\s+(male|female)\b'
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, text_lower)
+        if match:
+            groups = match.groups()
+            if len(groups) == 2:
+                if groups[0] in ['m', 'f']:
+                    gender = 'Male' if groups[0] == 'm' else 'Female'
+                    try:
+                        age = int(groups[1])
+                    except:
+                        continue
+                elif groups[1] in ['m', 'f']:
+                    gender = 'Male' if groups[1] == 'm' else 'Female'
+                    try:
+                        age = int(groups[0])
+                    except:
+                        continue
+                elif groups[1] in ['male', 'female']:
+                    gender = 'Male' if groups[1] == 'male' else 'Female'
+                    try:
+                        age = int(groups[0])
+                    except:
+                        continue
+                else:
+                    continue
+
+                if 16 <= age <= 80:
+                    return gender, age
+
+    return None, None
+
+
+FILLER = (
+    "I have been saving for a while and my employer offers a 401k match. "
+    "Should I pay off the car loan at 6% first or put more into the Roth IRA? "
+    "Rent is 1200 a month and I take home about 3400 after taxes. "
+)
+SNIPPETS = [
+    "M 25", "F,30", "32 M", "27f", "I'm 45 male", "i'm a 38 year old female",
+    "m 12 and 29 f", "25 m 30", "F 99", "my wife (f31) and i (m33)", "",
+    "I am 24", "over 18 years", "paid $50 for it",
+]
+
+
+def build_corpus(n_texts, seed=42):
+    """Synthetic posts: mostly filler, a mix of demographic snippets"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n_texts):
+        parts = [FILLER[:rng.randint(0, len(FILLER))]]
+        for _ in range(rng.randint(0, 2)):
+            parts.append(rng.choice(SNIPPETS))
+        rng.shuffle(parts)
+        text = " ".join(parts)
+        corpus.append(text.upper() if rng.random() < 0.05 else text)
+    corpus[::97] = [None] * len(corpus[::97])
+    return corpus
+
+
+def timed(label, func, n_texts):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:8.2f}s  {n_texts / elapsed:12,.0f} texts/sec")
+    return result, elapsed
+
+
+def main():
+    n_texts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"Building synthetic corpus of {n_texts:,} texts...")
+    corpus = build_corpus(n_texts)
+
+    expected, baseline = timed(
+        "legacy per-pattern", lambda: [legacy_extract_age_gender(t) for t in corpus], n_texts)
+    single, _ = timed(
+        "compiled single-pass", lambda: [age_gender.extract_age_gender(t) for t in corpus], n_texts)
+    (genders, ages), batch = timed(
+        "batch arrays", lambda: age_gender.extract_age_gender_batch(corpus), n_texts)
+    frame, _ = timed(
+        "pandas str.extract", lambda: age_gender.extract_age_gender_series(pd.Series(corpus)), n_texts)
+
+    assert single == expected, "single-pass results differ from legacy"
+    assert list(zip(genders, ages)) == expected, "batch results differ from legacy"
+    frame_results = [
+        (None if pd.isna(g) else g, None if pd.isna(a) else int(a))
+        for g, a in zip(frame['gender'], frame['age'])
+    ]
+    assert frame_results == expected, "pandas results differ from legacy"
+
+    print(f"All variants match the legacy results. Batch speedup: {baseline / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
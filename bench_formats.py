@@ -0,0 +1,94 @@
+"""
+Read benchmark: CSV versus Parquet for typical column-subset queries on the
+same synthetic posts table.
+
+Usage: python bench_formats.py [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from parquet_io import write_partitioned
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def synthetic_posts(n_rows, days=60, seed=11):
+    """Typed posts frame shaped like the scraper output"""
+    rng = np.random.default_rng(seed)
+    flairs = np.array(['Budgeting', 'Investing', 'Debt', 'Retirement', 'Taxes', 'Housing'])
+    created = pd.Timestamp('2025-05-01') + pd.to_timedelta(rng.integers(0, days * 86400, n_rows), unit='s')
+    has_age = rng.random(n_rows) < 0.2
+    return pd.DataFrame({
+        'post_id': [np.base_repr(value, 36).lower() for value in np.arange(n_rows) + 36 ** 6],
+        'title': 'Should I pay off my car loan or invest?',
+        'text': 'Long post body ' * 20,
+        'author': [f"user{value}" for value in rng.integers(0, 50_000, n_rows)],
+        'score': rng.integers(0, 5000, n_rows),
+        'upvote_ratio': rng.random(n_rows).round(2),
+        'num_comments': rng.integers(0, 500, n_rows),
+        'created_date': created,
+        'flair': flairs[rng.integers(0, len(flairs), n_rows)],
+        'gender': np.where(has_age, np.where(rng.random(n_rows) < 0.5, 'Male', 'Female'), 'Unknown'),
+        'age': pd.array(np.where(has_age, rng.integers(16, 80, n_rows), -1), dtype='Int8'),
+    })
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timed(label, func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<10} {best * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    posts = synthetic_posts(n_rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'posts.csv')
+        parquet_path = os.path.join(tmp, 'posts_parquet')
+        posts.to_csv(csv_path, index=False, date_format=DATE_FORMAT)
+        write_partitioned(posts.assign(created_day=posts['created_date'].dt.strftime('%Y-%m-%d'),
+                                       flair_partition=posts['flair']),
+                          parquet_path, ['created_day', 'flair_partition'])
+
+        print(f"{n_rows:,} posts: CSV {directory_size(csv_path) / 2**20:,.1f} MiB, "
+              f"Parquet {directory_size(parquet_path) / 2**20:,.1f} MiB")
+
+        queries = [
+            ("gender/age distribution",
+             lambda: pd.read_csv(csv_path, usecols=['gender', 'age']),
+             lambda: pd.read_parquet(parquet_path, columns=['gender', 'age'])),
+            ("daily mean score",
+             lambda: pd.read_csv(csv_path, usecols=['created_date', 'score'], parse_dates=['created_date']),
+             lambda: pd.read_parquet(parquet_path, columns=['created_date', 'score'])),
+            ("one flair, ages",
+             lambda: pd.read_csv(csv_path, usecols=['flair', 'age']).query("flair == 'Debt'"),
+             lambda: pd.read_parquet(parquet_path, columns=['age'],
+                                        filters=[('flair_partition', '=', 'Debt')])),
+        ]
+
+        for name, csv_query, parquet_query in queries:
+            print(name)
+            csv_rows = len(timed('csv', csv_query))
+            parquet_rows = len(timed('parquet', parquet_query))
+            assert csv_rows == parquet_rows, f"{name}: {csv_rows} vs {parquet_rows} rows"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Memory benchmark: post records kept as a list of dicts versus RecordColumns,
+and the cost of turning each into a DataFrame.
+
+Records are built with build_post_record from synthetic raw posts, with a
+fresh author string per post as PRAW returns them. Sizes are Python heap
+bytes traced by tracemalloc.
+
+Usage: python bench_records.py [n_records]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from post_pipeline import build_post_record
+from record_columns import RecordColumns
+from record_schema import POST_COLUMNS
+
+TITLES = ["Should I pay off my car loan or invest?", "Roth IRA vs 401k for a first job",
+          "Finally debt free after 4 years", "Budgeting with an irregular income"]
+FLAIRS = [None, 'Budgeting', 'Investing', 'Debt', 'Retirement', 'Taxes', 'Housing']
+
+
+def raw_posts(n_records, seed=5):
+    rng = random.Random(seed)
+    for i in range(n_records):
+        post_id = f"{36 ** 6 + i:x}"
+        introduction = f"I'm {rng.randint(18, 70)} male and " if rng.random() < 0.2 else ""
+        yield (post_id, rng.choice(TITLES), f"{introduction}my situation is number {i}.",
+               f"user{rng.randint(0, 50_000)}", rng.randint(0, 5000), round(rng.random(), 2),
+               rng.randint(0, 500), 1_750_000_000 - i * 60, f"https://www.reddit.com/r/personalfinance/comments/{post_id}/",
+               f"/r/personalfinance/comments/{post_id}/", rng.choice(FLAIRS), 'personalfinance')
+
+
+def measure(label, n_records, make_store, append, to_frame):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = make_store()
+    for raw in raw_posts(n_records):
+        append(store, build_post_record(raw))
+    build_seconds = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    frame = to_frame(store)
+    frame_seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print(f"{label:<16} {held / 2**20:>10,.1f} {held / n_records:>10,.0f} "
+          f"{peak / 2**20:>12,.1f} {build_seconds:>9.2f} {frame_seconds:>9.2f}")
+    return frame
+
+
+def main():
+    n_records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{n_records:,} post records")
+    print(f"{'store':<16} {'held MiB':>10} {'B/record':>10} {'frame peak MiB':>12} {'build s':>9} {'frame s':>9}")
+    dicts = measure('list of dicts', n_records, list, list.append, pd.DataFrame)
+    columns = measure('RecordColumns', n_records, lambda: RecordColumns(POST_COLUMNS),
+                      RecordColumns.append, RecordColumns.to_frame)
+    assert dicts['post_id'].tolist() == columns['post_id'].tolist()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+End-to-end scraper benchmark against the offline FakeReddit backend.
+
+Each scenario runs on a fresh fake subreddit with the same seed and a
+simulated clock, so posts/min, comments/min and API call counts are the same
+on every run and can be compared across commits. CPU seconds are measured
+for real and do vary a little.
+
+Usage: python bench_scraper.py [--latency 0.2] [--quota 1000] [--seed 0] [--json results.json]
+"""
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import time
+
+from fake_reddit import FakeReddit, VirtualClock
+from rate_limiter import AdaptiveRateLimiter
+
+
+def load_main_module():
+    """Import 'main file.py' despite the space in its name"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main file.py')
+    spec = importlib.util.spec_from_file_location('main_file', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+SCENARIOS = [
+    ('scrape_multiple_sources', lambda scraper: (scraper.scrape_multiple_sources(target_posts=3000), [])),
+    ('scrape_with_pagination', lambda scraper: (scraper.scrape_with_pagination(target_posts=2000), [])),
+    ('scrape_posts_and_comments', lambda scraper: scraper.scrape_posts_and_comments(
+        target_posts=500, comments_per_post=5)),
+    ('scrape_posts_and_comments[tree]', lambda scraper: scraper.scrape_posts_and_comments(
+        target_posts=500, comments_per_post=200, tree_calls=5)),
+]
+
+
+def run_scenario(main_file, run, latency, quota, seed):
+    clock = VirtualClock()
+    reddit = FakeReddit(seed=seed, latency=latency, quota=quota, clock=clock)
+    rate_limiter = AdaptiveRateLimiter(
+        limits=lambda: reddit.auth.limits, retry_on=main_file.RETRYABLE_ERRORS,
+        clock=clock.monotonic, wall_clock=clock.time, sleep=clock.sleep, rng=random.Random(seed))
+    scraper = main_file.ImprovedRedditScraper(reddit=reddit, rate_limiter=rate_limiter)
+
+    start, cpu_start = clock.time(), time.process_time()
+    posts, comments = run(scraper)
+    minutes = (clock.time() - start) / 60
+
+    return {
+        'posts': len(posts),
+        'comments': len(comments),
+        'simulated_minutes': round(minutes, 2),
+        'posts_per_minute': round(len(posts) / minutes, 1) if minutes else 0.0,
+        'comments_per_minute': round(len(comments) / minutes, 1) if minutes else 0.0,
+        'api_calls': scraper.api_calls_made,
+        'requests': reddit.total_requests,
+        'rejected': reddit.requests['rejected'],
+        'rate_limit_wait_seconds': round(rate_limiter.total_wait, 1),
+        'cpu_seconds': round(time.process_time() - cpu_start, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated seconds per request')
+    parser.add_argument('--quota', type=int, default=1000, help='requests allowed per 600s window')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    main_file = load_main_module()
+
+    results = {}
+    print(f"{'scenario':<34} {'posts':>6} {'comments':>8} {'sim min':>8} {'posts/min':>10} "
+          f"{'comments/min':>12} {'API calls':>9} {'429s':>5} {'CPU s':>6}")
+    for name, run in SCENARIOS:
+        result = run_scenario(main_file, run, args.latency, args.quota, args.seed)
+        results[name] = result
+        print(f"{name:<34} {result['posts']:>6,} {result['comments']:>8,} {result['simulated_minutes']:>8.1f} "
+              f"{result['posts_per_minute']:>10,.1f} {result['comments_per_minute']:>12,.1f} "
+              f"{result['api_calls']:>9,} {result['rejected']:>5} {result['cpu_seconds']:>6.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
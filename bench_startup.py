@@ -0,0 +1,75 @@
+"""
+Cold-start benchmark: what offline tools and the scraper pay before doing
+any work. Every step runs in a fresh interpreter so module caches don't
+hide import costs; the best of --repeat runs is reported. The connection
+check count comes from scraping twice against the offline FakeReddit.
+
+Usage: python bench_startup.py [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+LOAD_MAIN = (
+    "import importlib.util\n"
+    "spec = importlib.util.spec_from_file_location('main_file', 'main file.py')\n"
+    "main_file = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(main_file)\n"
+)
+LOAD_CLEANING = LOAD_MAIN.replace('main_file', 'data_cleaning').replace('main file.py', 'data cleaning.py')
+
+# (label, setup run before timing, timed statement)
+STEPS = [
+    ("interpreter", "", "pass"),
+    ("import age_gender (extractor)", "", "import age_gender"),
+    ("import post_pipeline + record_schema", "", "import post_pipeline, record_schema"),
+    ("import data cleaning.py", "", LOAD_CLEANING),
+    ("import main file.py", "", LOAD_MAIN),
+    ("construct ImprovedRedditScraper()", LOAD_MAIN, "scraper = main_file.ImprovedRedditScraper()"),
+    ("first client access (praw.Reddit)", LOAD_MAIN + "scraper = main_file.ImprovedRedditScraper()\n",
+     "scraper.reddit"),
+]
+
+
+def time_step(setup, statement):
+    """Milliseconds for statement in a fresh interpreter, after setup"""
+    code = (f"import time\n{setup}start = time.perf_counter()\n{statement}\n"
+            f"print((time.perf_counter() - start) * 1000)")
+    result = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def connection_checks():
+    """Subreddit 'about' requests made by two scrapes in one session"""
+    from bench_scraper import load_main_module
+    from fake_reddit import FakeReddit
+
+    main_file = load_main_module()
+    reddit = FakeReddit(latency=0.0)
+    scraper = main_file.ImprovedRedditScraper(reddit=reddit)
+    scraper.scrape_multiple_sources(target_posts=50)
+    scraper.scrape_with_pagination(target_posts=50)
+    return reddit.requests['about'], logging.getLogger().handlers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'step':<40} {'best ms':>9}")
+    for label, setup, statement in STEPS:
+        best = min(time_step(setup, statement) for _ in range(args.repeat))
+        print(f"{label:<40} {best:>9.1f}")
+
+    checks, handlers = connection_checks()
+    print(f"connection checks for two scrapes: {checks}")
+    print(f"root logging handlers after import: {len(handlers)}")
+
+
+if __name__ == "__main__":
+    main()
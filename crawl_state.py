@@ -0,0 +1,183 @@
+"""Persistent crawl state so an interrupted scrape can resume where it stopped"""
+import sqlite3
+import threading
+import time
+
+
+class CrawlState:
+    """
+    SQLite-backed store of seen post/comment IDs, per-source listing cursors
+    (the `after` fullname and how many items were consumed), counters, and
+    for incremental runs the newest item seen per listing plus the creation
+    time of every harvested post, and the IDs each listing returned last time
+    (used by source_planner.SourcePlanner). Use ':memory:' for a throwaway state.
+
+    Writes are batched in one transaction that is only committed on
+    checkpoint(), so callers can flush their output first and never record an
+    ID as seen before its record is on disk; close() discards whatever was not
+    committed. Set `commit_every` to also commit automatically after that many
+    changes.
+    """
+
+    def __init__(self, path='crawl_state.sqlite', commit_every=None):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS seen (
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                PRIMARY KEY (kind, id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS cursors (
+                source TEXT PRIMARY KEY,
+                after TEXT,
+                consumed INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS watermarks (
+                listing TEXT PRIMARY KEY,
+                newest_created_utc REAL NOT NULL,
+                newest_id TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS post_times (
+                post_id TEXT PRIMARY KEY,
+                created_utc REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS post_times_created ON post_times (created_utc);
+            CREATE TABLE IF NOT EXISTS listing_history (
+                source TEXT PRIMARY KEY,
+                ids BLOB NOT NULL,
+                updated_at REAL
+            );
+        ''')
+        self._conn.commit()
+
+    def _changed(self, count=1):
+        self._pending += count
+        if self.commit_every is not None and self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def seen_ids(self, kind):
+        """All IDs of one kind ('post', 'comment', ...) as an in-memory set"""
+        with self._lock:
+            rows = self._conn.execute('SELECT id FROM seen WHERE kind = ?', (kind,))
+            return {row[0] for row in rows}
+
+    def is_seen(self, kind, item_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM seen WHERE kind = ? AND id = ?', (kind, item_id)).fetchone()
+            return row is not None
+
+    def mark_seen(self, kind, item_ids):
+        """Record one ID or an iterable of IDs as seen"""
+        if isinstance(item_ids, str):
+            item_ids = [item_ids]
+        rows = [(kind, item_id) for item_id in item_ids]
+        with self._lock:
+            self._conn.executemany('INSERT OR IGNORE INTO seen (kind, id) VALUES (?, ?)', rows)
+            self._changed(len(rows))
+
+    def get_cursor(self, source):
+        """Return (after, consumed) for a listing source, or (None, 0)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT after, consumed FROM cursors WHERE source = ?', (source,)).fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def set_cursor(self, source, after, consumed):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cursors (source, after, consumed, updated_at) VALUES (?, ?, ?, ?)',
+                (source, after, consumed, time.time()))
+            self._changed()
+
+    def clear_cursor(self, source):
+        with self._lock:
+            self._conn.execute('DELETE FROM cursors WHERE source = ?', (source,))
+            self._changed()
+
+    def reset_cursors(self):
+        """Forget listing positions, e.g. to start a fresh crawl that still skips seen IDs"""
+        with self._lock:
+            self._conn.execute('DELETE FROM cursors')
+            self._changed()
+
+    def get_watermark(self, listing):
+        """Return (newest_created_utc, newest_id) seen in a listing, or (None, None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT newest_created_utc, newest_id FROM watermarks WHERE listing = ?',
+                (listing,)).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def set_watermark(self, listing, created_utc, item_id):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO watermarks (listing, newest_created_utc, newest_id) VALUES (?, ?, ?)',
+                (listing, created_utc, item_id))
+            self._changed()
+
+    def remember_post(self, post_id, created_utc):
+        """Record a harvested post's creation time so it can be refreshed later"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR IGNORE INTO post_times (post_id, created_utc) VALUES (?, ?)',
+                (post_id, created_utc))
+            self._changed()
+
+    def recent_posts(self, since_utc):
+        """IDs of harvested posts created at or after since_utc, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT post_id FROM post_times WHERE created_utc >= ? ORDER BY created_utc DESC',
+                (since_utc,))
+            return [row[0] for row in rows]
+
+    def load_listing_history(self):
+        """{source: packed int64 IDs} of each listing's most recent read"""
+        with self._lock:
+            return dict(self._conn.execute('SELECT source, ids FROM listing_history'))
+
+    def save_listing_history(self, source, ids):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO listing_history (source, ids, updated_at) VALUES (?, ?, ?)',
+                (source, ids, time.time()))
+            self._changed()
+
+    def load_counters(self):
+        with self._lock:
+            return dict(self._conn.execute('SELECT name, value FROM counters'))
+
+    def save_counters(self, counters):
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO counters (name, value) VALUES (?, ?)', counters.items())
+            self._changed(len(counters))
+
+    def checkpoint(self):
+        """Commit everything recorded so far"""
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def rollback(self):
+        """Discard everything recorded since the last commit"""
+        with self._lock:
+            self._conn.rollback()
+            self._pending = 0
+
+    def close(self):
+        """Close the database, discarding changes since the last checkpoint()"""
+        with self._lock:
+            self._conn.rollback()
+            self._conn.close()
@@ -1,71 +1,277 @@
-import pandas as pd
+import os
+import time
+
 import numpy as np
+import pandas as pd
+
+from aggregate_cube import AggregateCube, cube_path_for
+from near_duplicates import NearDuplicateIndex, post_texts
+from reddit_ids import decode_ids
+
+# Rows read per chunk; memory use depends on this, not on the file size
+CHUNK_SIZE = 100_000
+
+# Timestamp format written by the scraper
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Explicit dtypes for reading; only columns present in a file are used.
+# Gender and flair are read as strings so they can be filled, then stored as categories
+READ_DTYPES = {
+    'post_id': 'string',
+    'comment_id': 'string',
+    'comment_parent_id': 'string',
+    'title': 'string',
+    'text': 'string',
+    'author': 'string',
+    'comment_body': 'string',
+    'comment_author': 'string',
+    'score': 'Int32',
+    'comment_score': 'Int32',
+    'upvote_ratio': 'float32',
+    'num_comments': 'Int32',
+    'url': 'string',
+    'permalink': 'string',
+    'flair': 'string',
+    'gender': 'string',
+    'comment_gender': 'string',
+    'age': 'float32',
+    'comment_age': 'float32',
+    'age_gender_inferred': 'boolean',
+    'comment_age_gender_inferred': 'boolean',
+    'has_selftext': 'boolean',
+    'text_length': 'Int32',
+    'subreddit': 'string',
+    'duplicate_cluster_id': 'string'
+}
+OUTPUT_DTYPES = {
+    'flair': 'category',
+    'gender': 'category',
+    'comment_gender': 'category',
+    'subreddit': 'category',
+    'age': 'Int8',
+    'comment_age': 'Int8'
+}
+
+# Cleaning steps for each kind of file
+POSTS_CLEANING = {
+    'id_column': 'post_id',
+    # Using -1 to denote missing age
+    'fill_values': {'gender': 'Unknown', 'age': -1, 'flair': 'No Flair', 'age_gender_inferred': False},
+    'date_columns': ['created_date'],
+    'strip_prefixes': {}
+}
+COMMENTS_CLEANING = {
+    'id_column': 'comment_id',
+    'fill_values': {'comment_gender': 'Unknown', 'comment_age': -1, 'comment_age_gender_inferred': False},
+    'date_columns': ['comment_created_date'],
+    'strip_prefixes': {'post_id': 't3_', 'comment_parent_id': 't[13]_'}
+}
+
+
+class CompactIdSet:
+    """
+    Set of IDs kept as sorted int64 runs (8 bytes per ID) for deduplicating
+    across chunks. Reddit IDs are base36 and decode exactly to non-negative
+    keys; any other value (missing, prefixed or longer) is stored as a 64-bit
+    hash with the sign bit set, so an ID has the same key in every chunk.
+    Runs are merged as they grow, so there are only O(log n) of them to search.
+    """
+
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    @staticmethod
+    def encode(ids):
+        ids = pd.Series(ids, dtype=object).fillna('')
+        keys = decode_ids(ids)
+        base36 = keys >= 0
+        hashed = pd.util.hash_array(ids[~base36].astype(str).to_numpy(dtype=object))
+        keys[~base36] = (hashed | np.uint64(1 << 63)).view(np.int64)
+        return keys
+
+    def _contains(self, values):
+        found = np.zeros(len(values), dtype=bool)
+        for run in self._runs:
+            positions = np.searchsorted(run, values).clip(max=len(run) - 1)
+            found |= run[positions] == values
+        return found
+
+    def add_new(self, ids):
+        """Add ids and return a mask of those not seen before (first occurrence wins)"""
+        values = self.encode(ids)
+        new = ~self._contains(values) & ~pd.Series(values).duplicated().to_numpy()
+
+        if new.any():
+            self._runs.append(np.sort(values[new]))
+            while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+                last = self._runs.pop()
+                self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+        return new
+
+
+def clean_chunk(df, id_column, fill_values, date_columns, strip_prefixes):
+    """Apply the cleaning steps to one chunk"""
+    # Handle missing values (gender/age and, depending on the file, text or flair)
+    for column, value in fill_values.items():
+        if column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype) and value not in df[column].cat.categories:
+                df[column] = df[column].cat.add_categories([value])
+            df[column] = df[column].fillna(value)
+
+    # Convert dates with the scraper's fixed format
+    for column in date_columns:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=DATE_FORMAT)
+
+    # Remove fullname prefixes such as 't3_' from ID columns
+    for column, prefix in strip_prefixes.items():
+        if column in df.columns:
+            df[column] = df[column].str.replace(prefix, '', regex=True)
+
+    return df.astype({column: dtype for column, dtype in OUTPUT_DTYPES.items() if column in df.columns})
 
-# --- File 1: reddit_multi_source_posts_20250621_081206.csv ---
 
-# Load the CSV file
-df_multi_source = pd.read_csv('reddit_multi_source_posts_20250621_081206.csv')
+def is_parquet(path):
+    """Parquet files and partitioned Parquet dataset directories"""
+    return path.endswith('.parquet') or os.path.isdir(path)
 
-# Handle missing values in 'gender' and 'age'
-df_multi_source['gender'].fillna('Unknown', inplace=True)
-df_multi_source['age'].fillna(-1, inplace=True) # Using -1 to denote missing age
 
-# Fill missing values in 'text' and 'flair'
-df_multi_source['text'].fillna('No Text', inplace=True)
-df_multi_source['flair'].fillna('No Flair', inplace=True)
+def read_chunks(input_path, chunksize=CHUNK_SIZE):
+    """Read a CSV with explicit dtypes, or Parquet with its stored dtypes, in chunks"""
+    if is_parquet(input_path):
+        from parquet_io import iter_parquet_chunks
+        return iter_parquet_chunks(input_path, batch_size=chunksize)
 
-# Convert 'created_date' to datetime
-df_multi_source['created_date'] = pd.to_datetime(df_multi_source['created_date'])
+    columns = pd.read_csv(input_path, nrows=0).columns
+    dtypes = {column: dtype for column, dtype in READ_DTYPES.items() if column in columns}
+    return pd.read_csv(input_path, dtype=dtypes, chunksize=chunksize)
 
-# Remove duplicate posts
-df_multi_source.drop_duplicates(subset=['post_id'], inplace=True)
 
-# Save the updated cleaned data
-df_multi_source.to_csv('cleaned_with_age_gender_reddit_multi_source_posts.csv', index=False)
+def iter_clean_chunks(input_path, id_column, fill_values, date_columns, strip_prefixes=None,
+                      chunksize=CHUNK_SIZE, stats=None, near_duplicate_index=None, cube=None):
+    """
+    Stream a CSV or Parquet input in chunks, yielding cleaned and de-duplicated
+    chunks. With a near_duplicates.NearDuplicateIndex, posts also get a
+    duplicate_cluster_id that groups reposts and copies; with an
+    aggregate_cube.AggregateCube, every cleaned chunk is added to it.
+    """
+    strip_prefixes = strip_prefixes or {}
+    stats = stats if stats is not None else {}
+    stats.update(rows_in=0, rows_out=0, duplicates=0, near_duplicates=0)
+    seen_ids = CompactIdSet()
 
+    for chunk in read_chunks(input_path, chunksize):
+        stats['rows_in'] += len(chunk)
+        # Texts before 'No Text' is filled in, so empty posts don't share a shingle
+        texts = post_texts(chunk) if near_duplicate_index is not None else None
+        chunk = clean_chunk(chunk, id_column, fill_values, date_columns, strip_prefixes)
 
-# --- File 2: reddit_data_comments_20250621_004521.csv ---
+        # Remove duplicates, including those in earlier chunks
+        new = seen_ids.add_new(chunk[id_column])
+        chunk = chunk[new]
+        if near_duplicate_index is not None:
+            clusters = near_duplicate_index.assign(chunk[id_column], texts[new])
+            chunk['duplicate_cluster_id'] = pd.array(clusters, dtype='string')
+            stats['near_duplicates'] += int((chunk['duplicate_cluster_id'] != chunk[id_column]).sum())
+        if cube is not None:
+            cube.add(chunk)
+        stats['rows_out'] += len(chunk)
+        stats['duplicates'] = stats['rows_in'] - stats['rows_out']
+        yield chunk
 
-# Load the CSV file
-df_comments = pd.read_csv('reddit_data_comments_20250621_004521.csv')
 
-# Handle missing values in 'comment_gender' and 'comment_age'
-df_comments['comment_gender'].fillna('Unknown', inplace=True)
-df_comments['comment_age'].fillna(-1, inplace=True) # Using -1 to denote missing age
+def clean_file(input_path, output_path, id_column, fill_values, date_columns, strip_prefixes=None,
+               chunksize=CHUNK_SIZE, near_duplicate_index=None, cube=None):
+    """
+    Clean a CSV or Parquet file at constant memory, writing the result chunk by
+    chunk. A '.parquet' output keeps the dtypes, one row group per chunk.
+    """
+    start = time.time()
+    stats = {}
+    temp_path = output_path + '.tmp'
+    chunks = iter_clean_chunks(input_path, id_column, fill_values, date_columns,
+                               strip_prefixes, chunksize, stats, near_duplicate_index, cube)
 
-# Convert 'comment_created_date' to datetime
-df_comments['comment_created_date'] = pd.to_datetime(df_comments['comment_created_date'])
+    if output_path.endswith('.parquet'):
+        from parquet_io import ParquetChunkWriter
+        writer = ParquetChunkWriter(temp_path)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        finally:
+            writer.close()
+    else:
+        header = True
+        for chunk in chunks:
+            chunk.to_csv(temp_path, mode='w' if header else 'a', header=header, index=False,
+                         date_format=DATE_FORMAT)
+            header = False
+    os.replace(temp_path, output_path)
 
-# Clean 'post_id' and 'comment_parent_id' by removing prefixes
-df_comments['post_id'] = df_comments['post_id'].str.replace('t3_', '')
-df_comments['comment_parent_id'] = df_comments['comment_parent_id'].str.replace('t[13]_', '', regex=True)
+    stats['seconds'] = time.time() - start
+    near_duplicates = (f", {stats['near_duplicates']:,} near-duplicates clustered"
+                       if near_duplicate_index is not None else '')
+    print(f"{input_path} -> {output_path}: {stats['rows_out']:,} rows "
+          f"({stats['duplicates']:,} duplicates removed{near_duplicates}) in {stats['seconds']:.1f}s")
+    return stats
 
-# Remove duplicate comments
-df_comments.drop_duplicates(subset=['comment_id'], inplace=True)
 
-# Save the updated cleaned data
-df_comments.to_csv('cleaned_with_age_gender_reddit_data_comments.csv', index=False)
+def clean_posts(input_path, output_path, fill_text=False, chunksize=CHUNK_SIZE, near_duplicate_index=None,
+                cube=False):
+    """
+    near_duplicate_index is a NearDuplicateIndex or its directory; passing the
+    same one for several files clusters copies across them and across runs.
+    With cube=True the summary cube of the cleaned posts is written next to
+    the output (see aggregate_cube.cube_path_for).
+    """
+    fill_values = dict(POSTS_CLEANING['fill_values'])
+    if fill_text:
+        fill_values['text'] = 'No Text'
+    index = near_duplicate_index
+    if isinstance(index, str):
+        index = NearDuplicateIndex(index)
+    summary = AggregateCube() if cube else None
+    try:
+        stats = clean_file(input_path, output_path, POSTS_CLEANING['id_column'], fill_values,
+                           POSTS_CLEANING['date_columns'], POSTS_CLEANING['strip_prefixes'], chunksize,
+                           index, summary)
+    finally:
+        if index is not None:
+            index.flush()
 
+    if summary is not None:
+        output_stat = os.stat(output_path)
+        summary.sources[os.path.abspath(output_path)] = [output_stat.st_size, output_stat.st_mtime]
+        summary.save(cube_path_for(output_path))
+    return stats
 
-# --- File 3: reddit_data_posts_20250621_004521.csv ---
 
-# Load the CSV file
-df_posts = pd.read_csv('reddit_data_posts_20250621_004521.csv')
+def clean_comments(input_path, output_path, chunksize=CHUNK_SIZE):
+    return clean_file(input_path, output_path, chunksize=chunksize, **COMMENTS_CLEANING)
 
-# Handle missing values in 'gender' and 'age'
-df_posts['gender'].fillna('Unknown', inplace=True)
-df_posts['age'].fillna(-1, inplace=True) # Using -1 to denote missing age
 
-# Fill missing values in 'flair'
-df_posts['flair'].fillna('No Flair', inplace=True)
+if __name__ == "__main__":
+    # --- File 1: reddit_multi_source_posts_20250621_081206.csv ---
+    # Both posts files share one near-duplicate index, so copies across them are clustered too
+    clean_posts('reddit_multi_source_posts_20250621_081206.csv',
+                'cleaned_with_age_gender_reddit_multi_source_posts.csv', fill_text=True,
+                near_duplicate_index='near_duplicate_index', cube=True)
 
-# Convert 'created_date' to datetime
-df_posts['created_date'] = pd.to_datetime(df_posts['created_date'])
+    # --- File 2: reddit_data_comments_20250621_004521.csv ---
+    clean_comments('reddit_data_comments_20250621_004521.csv',
+                   'cleaned_with_age_gender_reddit_data_comments.csv')
 
-# Remove duplicate posts
-df_posts.drop_duplicates(subset=['post_id'], inplace=True)
+    # --- File 3: reddit_data_posts_20250621_004521.csv ---
+    clean_posts('reddit_data_posts_20250621_004521.csv',
+                'cleaned_with_age_gender_reddit_data_posts.csv',
+                near_duplicate_index='near_duplicate_index', cube=True)
 
-# Save the updated cleaned data
-df_posts.to_csv('cleaned_with_age_gender_reddit_data_posts.csv', index=False)
+    print("All three files have been re-processed to include 'age' and 'gender' columns.")
 
-print("All three files have been re-processed to include 'age' and 'gender' columns.")
\ No newline at end of file
+    # Parse-once thread index over the cleaned posts and their comments
+    from thread_index import build_thread_index
+    build_thread_index('cleaned_with_age_gender_reddit_data_posts.csv',
+                       'cleaned_with_age_gender_reddit_data_comments.csv', 'thread_index')
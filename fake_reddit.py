@@ -0,0 +1,405 @@
+"""
+Offline stand-in for praw.Reddit with a deterministic synthetic subreddit,
+for benchmarking and replaying the scraper without credentials or network.
+
+It implements what ImprovedRedditScraper uses: subreddit listings (hot, new,
+top, rising, controversial) paged 100 at a time and capped at 1000 items like
+Reddit's, `subscribers`, `submission()` with a comment forest supporting
+`replace_more`, /api/morechildren, `info()` and `auth.limits`. Every request
+costs `latency` seconds and one unit of a `quota` that resets every `window`
+seconds; requests beyond the quota raise prawcore's TooManyRequests.
+
+With the default VirtualClock, latency and rate-limit sleeps advance a
+simulated clock instead of sleeping, so runs are fast and the results are
+identical from run to run. Pass the same clock's time/monotonic/sleep to the
+rate limiter.
+"""
+import random
+import threading
+from collections import Counter
+
+import numpy as np
+from praw.models import MoreComments
+from prawcore.exceptions import TooManyRequests
+
+LISTING_PAGE_SIZE = 100
+LISTING_CAP = 1000  # Reddit stops every listing after about 1000 items
+
+TITLES = [
+    "Should I pay off my car loan or invest?",
+    "How much should I keep in an emergency fund?",
+    "Roth IRA vs 401k for a first job",
+    "Finally debt free after 4 years",
+    "Is it worth refinancing my mortgage now?",
+    "Budgeting with an irregular income"
+]
+INTRODUCTIONS = ["", "", "", "I'm {age} {gender_word} and ", "{letter}{age} here, ", "({age}{letter}) "]
+FLAIRS = [None, 'Budgeting', 'Investing', 'Debt', 'Retirement', 'Taxes', 'Housing']
+
+
+class VirtualClock:
+    """Simulated time: sleep() advances the clock immediately"""
+
+    def __init__(self, start=1_750_000_000.0):
+        self._now = start
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._now
+
+    def monotonic(self):
+        return self._now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self._now += max(seconds, 0.0)
+
+
+class _RateLimitedResponse:
+    """The parts of a requests.Response that prawcore's TooManyRequests reads"""
+    status_code = 429
+    text = ''
+
+    def __init__(self, retry_after):
+        self.headers = {'retry-after': f"{retry_after:.0f}"}
+
+
+def base36(value):
+    return np.base_repr(value, 36).lower()
+
+
+class FakeAuth:
+    def __init__(self, reddit):
+        self._reddit = reddit
+
+    @property
+    def limits(self):
+        """Like PRAW 8: remaining and used, without the reset time"""
+        with self._reddit._lock:
+            self._reddit._roll_window()
+            return {'remaining': self._reddit.quota - self._reddit.used, 'used': self._reddit.used}
+
+
+class FakeComment:
+    def __init__(self, comment_id, parent_id, body, author, score, created_utc):
+        self.id = comment_id
+        self.fullname = f"t1_{comment_id}"
+        self.parent_id = parent_id
+        self.body = body
+        self.author = author
+        self.score = score
+        self.created_utc = created_utc
+        self.replies = []
+        self.submission = None
+
+
+class FakeCommentForest(list):
+    """Top-level comments (and MoreComments) of a submission"""
+
+    def __init__(self, submission, items):
+        super().__init__(items)
+        self._submission = submission
+
+    def replace_more(self, limit=32):
+        """Like PRAW: expand up to `limit` MoreComments (one request each) and drop the rest"""
+        expanded = 0
+
+        def visit(items):
+            nonlocal expanded
+            kept = []
+            for item in items:
+                if isinstance(item, MoreComments):
+                    if limit is None or expanded < limit:
+                        expanded += 1
+                        kept.extend(visit(item.comments()))
+                    continue
+                item.replies = visit(item.replies)
+                kept.append(item)
+            return kept
+
+        self[:] = visit(self)
+        return []
+
+
+class FakeSubmission:
+    def __init__(self, reddit, index):
+        self._reddit = reddit
+        self._index = index
+        rng = random.Random(reddit.seed * 1_000_003 + index)
+
+        self.id = base36(36 ** 5 + index)
+        self.fullname = f"t3_{self.id}"
+        self.created_utc = reddit.newest_utc - index * reddit.post_interval
+        age = rng.randint(16, 80)
+        gender = rng.choice('mf')
+        introduction = rng.choice(INTRODUCTIONS).format(
+            age=age, letter=gender.upper(), gender_word='male' if gender == 'm' else 'female')
+        self.title = rng.choice(TITLES)
+        self.selftext = (introduction + "here is my situation. " * rng.randint(0, 40)).strip()
+        self.author = None if rng.random() < 0.03 else f"user{rng.randint(0, 20_000)}"
+        self.score = int(rng.paretovariate(1.2) * 10)
+        self.upvote_ratio = round(rng.uniform(0.5, 1.0), 2)
+        self.num_comments = rng.randint(0, reddit.max_comments)
+        self.url = f"https://www.reddit.com/r/{reddit.subreddit_name}/comments/{self.id}/"
+        self.permalink = f"/r/{reddit.subreddit_name}/comments/{self.id}/"
+        self.link_flair_text = rng.choice(FLAIRS)
+        self.comment_sort = 'confidence'
+        self.comment_limit = 2048
+        self._comments = None
+
+    @property
+    def comments(self):
+        """The comment forest, fetched with one request on first access"""
+        if self._comments is None:
+            self._reddit._request('comments')
+            self._comments = FakeCommentForest(self, self._reddit._initial_forest(self))
+        return self._comments
+
+
+class FakeListing:
+    """
+    Iterator over one listing, fetched a page per request like PRAW's
+    ListingGenerator: it keeps the `after` position and the current page, so
+    a next() that failed on a rejected request can be retried and re-requests
+    the same page.
+    """
+
+    def __init__(self, reddit, name, limit, params):
+        self._reddit = reddit
+        self._order = reddit._order(name)
+        self.limit = limit
+        self.after = (params or {}).get('after')
+        self.yielded = 0
+        self._page = []
+        self._page_index = 0
+        self._exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def _start(self):
+        """Position in the listing just past `after`"""
+        if not self.after:
+            return 0
+        index = int(self.after.split('_', 1)[1], 36) - 36 ** 5
+        return self._order.index(index) + 1 if index in self._order else len(self._order)
+
+    def _next_page(self):
+        start = self._start()
+        size = LISTING_PAGE_SIZE if self.limit is None else min(LISTING_PAGE_SIZE, self.limit - self.yielded)
+        if start >= len(self._order):
+            self._exhausted = True
+            return
+        # A rejected request raises before any state changes
+        self._reddit._request('listing')
+        self._page = [FakeSubmission(self._reddit, index) for index in self._order[start:start + size]]
+        self._page_index = 0
+        if self._page:
+            self.after = self._page[-1].fullname
+        if len(self._page) < size or start + size >= len(self._order):
+            self._exhausted = True
+
+    def __next__(self):
+        if self.limit is not None and self.yielded >= self.limit:
+            raise StopIteration
+        if self._page_index >= len(self._page):
+            if self._exhausted:
+                raise StopIteration
+            self._next_page()
+            if not self._page:
+                raise StopIteration
+        self._page_index += 1
+        self.yielded += 1
+        return self._page[self._page_index - 1]
+
+
+class FakeSubreddit:
+    def __init__(self, reddit, name):
+        self._reddit = reddit
+        self.display_name = name
+
+    @property
+    def subscribers(self):
+        self._reddit._request('about')
+        return 18_000_000
+
+    def hot(self, limit=100, params=None):
+        return self._reddit._listing('hot', limit, params)
+
+    def new(self, limit=100, params=None):
+        return self._reddit._listing('new', limit, params)
+
+    def rising(self, limit=100, params=None):
+        return self._reddit._listing('rising', limit, params)
+
+    def top(self, time_filter='all', limit=100, params=None):
+        return self._reddit._listing(f"top_{time_filter}", limit, params)
+
+    def controversial(self, time_filter='all', limit=100, params=None):
+        return self._reddit._listing(f"controversial_{time_filter}", limit, params)
+
+
+class FakeReddit:
+    """
+    Deterministic fake of the praw.Reddit surface used by the scraper.
+
+    `latency` is seconds per request, or a dict by endpoint ('listing',
+    'about', 'comments', 'morechildren', 'info'). `requests` counts the
+    requests made per endpoint.
+    """
+
+    def __init__(self, num_posts=20_000, max_comments=80, seed=0, latency=0.2, quota=1000,
+                 window=600, clock=None, subreddit_name='personalfinance', post_interval=300):
+        self.num_posts = num_posts
+        self.max_comments = max_comments
+        self.seed = seed
+        self.latency = latency
+        self.quota = quota
+        self.window = window
+        self.clock = clock or VirtualClock()
+        self.subreddit_name = subreddit_name
+        self.post_interval = post_interval
+        self.newest_utc = self.clock.time()
+
+        self.auth = FakeAuth(self)
+        self.requests = Counter()
+        self.used = 0
+        self._window_start = self.clock.time()
+        self._lock = threading.Lock()
+        self._orders = {}
+        self._comment_trees = {}
+
+    # --- request accounting ---
+
+    def _roll_window(self):
+        if self.clock.time() >= self._window_start + self.window:
+            self._window_start = self.clock.time()
+            self.used = 0
+
+    def _request(self, endpoint):
+        with self._lock:
+            self._roll_window()
+            if self.used >= self.quota:
+                self.requests['rejected'] += 1
+                retry_after = self._window_start + self.window - self.clock.time()
+                raise TooManyRequests(_RateLimitedResponse(retry_after))
+            self.used += 1
+            self.requests[endpoint] += 1
+        latency = self.latency.get(endpoint, 0.0) if isinstance(self.latency, dict) else self.latency
+        self.clock.sleep(latency)
+
+    @property
+    def total_requests(self):
+        return sum(count for endpoint, count in self.requests.items() if endpoint != 'rejected')
+
+    # --- listings ---
+
+    def _order(self, name):
+        """Post indexes for a listing; sources overlap the way Reddit's do"""
+        if name not in self._orders:
+            rng = random.Random(f"{self.seed}/{name}")
+            indexes = list(range(self.num_posts))
+            spans = {'week': 7, 'month': 30, 'year': 365}
+            if name == 'new':
+                order = indexes
+            elif name == 'rising':
+                order = indexes[:100]
+            elif name == 'hot':
+                # Recent posts, shuffled by a score-like weight
+                order = sorted(indexes[:3000], key=lambda i: rng.random() * (1 + i / 500))
+            else:
+                kind, _, time_filter = name.partition('_')
+                if time_filter in spans:
+                    days = spans[time_filter]
+                    indexes = indexes[:max(1, int(days * 86400 / self.post_interval))]
+                order = sorted(indexes, key=lambda i: -FakeSubmission(self, i).score
+                               if kind == 'top' else rng.random())
+            self._orders[name] = order[:LISTING_CAP]
+        return self._orders[name]
+
+    def _listing(self, name, limit, params):
+        return FakeListing(self, name, limit, params)
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    def submission(self, id):
+        return FakeSubmission(self, int(id, 36) - 36 ** 5)
+
+    def info(self, fullnames=None):
+        fullnames = list(fullnames or [])
+        for i, fullname in enumerate(fullnames):
+            if i % 100 == 0:
+                self._request('info')
+            yield self.submission(fullname.split('_', 1)[1])
+
+    # --- comments ---
+
+    def _comment_tree(self, submission):
+        """(comments by id, child ids by parent fullname) for a submission, cached"""
+        if submission.id not in self._comment_trees:
+            rng = random.Random(f"{self.seed}/comments/{submission.id}")
+            comments, children = {}, {}
+            for j in range(submission.num_comments):
+                comment_id = base36(36 ** 6 + submission._index * 1000 + j)
+                if j == 0 or rng.random() < 0.35:
+                    parent = submission.fullname
+                else:
+                    parent = f"t1_{rng.choice(list(comments))}"
+                age = rng.randint(16, 80)
+                body = rng.choice([f"I'm {age} and in the same boat.", f"{age}F here, same.",
+                                   "Pay off the debt first.", "Max the match, then the IRA.",
+                                   "[deleted]"])
+                comments[comment_id] = (parent, body, f"user{rng.randint(0, 20_000)}",
+                                        rng.randint(-5, 300), submission.created_utc + rng.randint(60, 86400))
+                children.setdefault(parent, []).append(comment_id)
+            self._comment_trees[submission.id] = (comments, children)
+        return self._comment_trees[submission.id]
+
+    def _make_comment(self, submission, comment_id):
+        comments, _ = self._comment_tree(submission)
+        comment = FakeComment(comment_id, *comments[comment_id])
+        comment.submission = submission
+        return comment
+
+    def _more(self, submission, parent, children):
+        more = MoreComments(self, {'count': len(children), 'children': list(children),
+                                   'parent_id': parent, 'id': children[0], 'name': f"t1_{children[0]}"})
+        more.submission = submission
+        return more
+
+    def _initial_forest(self, submission, shown=20, depth=3, replies_shown=5):
+        """What one comments request returns: the first comments nested a few levels, the rest as MoreComments"""
+        _, children = self._comment_tree(submission)
+
+        def level(parent, remaining_depth, limit):
+            kids = children.get(parent, [])
+            if remaining_depth == 0:
+                return [self._more(submission, parent, kids)] if kids else []
+            items = []
+            for comment_id in kids[:limit]:
+                comment = self._make_comment(submission, comment_id)
+                comment.replies = level(comment.fullname, remaining_depth - 1, replies_shown)
+                items.append(comment)
+            if len(kids) > limit:
+                items.append(self._more(submission, parent, kids[limit:]))
+            return items
+
+        return level(submission.fullname, depth, shown)
+
+    def post(self, path, data=None, **kwargs):
+        """Only /api/morechildren: the requested comments, with MoreComments for their replies"""
+        if 'morechildren' not in path:
+            raise NotImplementedError(f"FakeReddit does not implement POST {path}")
+        self._request('morechildren')
+        submission = self.submission(data['link_id'].split('_', 1)[1])
+        _, children = self._comment_tree(submission)
+
+        items = []
+        for comment_id in data['children'].split(','):
+            comment = self._make_comment(submission, comment_id)
+            items.append(comment)
+            kids = children.get(comment.fullname)
+            if kids:
+                items.append(self._more(submission, comment.fullname, kids))
+        return items
@@ -1,97 +1,425 @@
 import praw
 import pandas as pd
 import time
-import re
-import os
+import sys
+import threading
+import heapq
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+from praw.endpoints import API_PATH
+from praw.models import MoreComments
+from prawcore.exceptions import RequestException, ServerError, TooManyRequests
+
+from aggregate_cube import AggregateCube
+from age_gender import extract_age_gender
+from author_profiles import AuthorProfileCache
+from crawl_state import CrawlState
+from metrics import MetricsRegistry
+from post_pipeline import build_post_record, raw_post
+from rate_limiter import AdaptiveRateLimiter
+from record_columns import RecordColumns
+from record_schema import COMMENT_COLUMNS, POST_COLUMNS
+from record_sink import SINK_FORMATS, StreamingSink
+from source_planner import IdBitmap, SourcePlanner
+
 logger = logging.getLogger(__name__)
 
-def extract_age_gender(text):
-    """Extract gender and age from post text"""
-    if not text:
-        return None, None
-        
-    text_lower = text.lower()
-    
-    # Simple patterns that are most likely to work
-    patterns = [
-        r'\b([mf])[,\s]*(\d{2})\b',  # M 25, F,30
-        r'\b(\d{2})[,\s]*([mf])\b',  # 25 M, 30,F
-        r'\bi.?m\s+(\d{2})\s+(male|female)\b',  # I'm 25 male
-        r'\bi.?m\s+a\s+(\d{2})\s+year\s+old\s+(male|female)\b'  # I'm a 25 year old male
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            groups = match.groups()
-            
-            # Handle different pattern formats
-            if len(groups) == 2:
-                if groups[0] in ['m', 'f']:
-                    gender = 'Male' if groups[0] == 'm' else 'Female'
-                    try:
-                        age = int(groups[1])
-                    except:
-                        continue
-                elif groups[1] in ['m', 'f']:
-                    gender = 'Male' if groups[1] == 'm' else 'Female'
-                    try:
-                        age = int(groups[0])
-                    except:
-                        continue
-                elif groups[1] in ['male', 'female']:
-                    gender = 'Male' if groups[1] == 'male' else 'Female'
-                    try:
-                        age = int(groups[0])
-                    except:
-                        continue
-                else:
-                    continue
-                    
-                if 16 <= age <= 80:
-                    return gender, age
-                    
-    return None, None
+# Transient API failures worth retrying with backoff
+RETRYABLE_ERRORS = (RequestException, ServerError, TooManyRequests)
+
+# Items per listing request; PRAW fetches listings in pages of 100
+LISTING_PAGE_SIZE = 100
+
+# Fields kept per post with keep_records=False, enough to pick posts for comment collection
+RETAINED_POST_COLUMNS = {name: POST_COLUMNS[name] for name in ('post_id', 'age', 'score', 'subreddit')}
+
+# Counters persisted in the crawl state so totals survive a restart
+PERSISTED_COUNTERS = (
+    'total_posts_scraped',
+    'total_comments_scraped',
+    'posts_with_age_gender',
+    'comments_with_age_gender',
+    'api_calls_made',
+    'more_comments_calls',
+    'more_comments_gained',
+    'profile_fills'
+)
+
+# Reddit's /api/morechildren accepts at most this many comment IDs per request
+MORECHILDREN_BATCH = 100
+
+class ListingProgress:
+    """
+    Items read from a listing but not yet settled, in listing order. A new post
+    settles once its record has come out of processing and been written to the
+    sinks; only then is it marked seen and the listing's cursor (if it has a
+    source_name) moved past it, so the crawl state never covers a post whose
+    record has not been written. Duplicates settle with the items before them.
+    """
+
+    def __init__(self, scraper, source_name=None):
+        self.scraper = scraper
+        self.source_name = source_name
+        self.consumed = 0
+        self._items = deque()
+        self._new = 0
+
+    def read(self, post, new):
+        """Record the next listing item and whether it is a new post"""
+        self.consumed += 1
+        self._items.append((post.id, post.created_utc, self.consumed, new))
+        self._new += int(new)
+
+    def settle(self, in_flight=0):
+        """Settle everything before the last `in_flight` new posts, which are still being processed"""
+        last = None
+        with self.scraper._state_lock:
+            while self._items:
+                post_id, created_utc, consumed, new = self._items[0]
+                if new:
+                    if self._new <= in_flight:
+                        break
+                    self._new -= 1
+                    self.scraper._mark_post_seen(post_id, created_utc)
+                last = self._items.popleft()
+            if last is not None and self.source_name is not None:
+                self.scraper._advance_cursor(self.source_name, last[0], last[2])
 
 class ImprovedRedditScraper:
-    def __init__(self, client_id=None, client_secret=None, reddit_username=None):
+    def __init__(self, client_id=None, client_secret=None, reddit_username=None,
+                 reddit=None, rate_limiter=None, post_sink=None, comment_sink=None,
+                 keep_records=True, crawl_state=None, subreddit='personalfinance',
+                 post_pipeline=None, metrics=None, author_profiles=None):
         # Use provided credentials or defaults
         self.client_id = client_id or "St5Ln2XKuKmwmOKOmUZCmQ"
         self.client_secret = client_secret or "YtZw89rjpfHUpHWb_ahgBef241phsw"
         self.reddit_username = reddit_username or "plsgivemebloodvials"
 
+        # Default community; every scrape method also accepts subreddit_name
+        self.subreddit_name = subreddit
+
         # Initialize counters
         self.total_posts_scraped = 0
         self.total_comments_scraped = 0
         self.posts_with_age_gender = 0
         self.comments_with_age_gender = 0
         self.api_calls_made = 0
+        # Extra requests spent expanding MoreComments, and the comments they returned
+        self.more_comments_calls = 0
+        self.more_comments_gained = 0
+        # Records whose age/gender came from the author's profile rather than their own text
+        self.profile_fills = 0
         self.start_time = None
+        self._stats_lock = threading.Lock()
+        # Held while records are marked seen and while checkpoints flush and
+        # commit, so a checkpoint never commits an ID whose record it did not flush
+        self._state_lock = threading.RLock()
 
+        # Optional streaming sinks that records are appended to as they are built.
+        # With keep_records=False the scrape methods only keep the fields needed
+        # to pick posts for comment collection, so memory stays flat
+        self.post_sink = post_sink
+        self.comment_sink = comment_sink
+        self.keep_records = keep_records
+
+        # Optional post_pipeline.PostPipeline; when set, record building runs on
+        # its worker pool instead of inside the listing loops
+        self.post_pipeline = post_pipeline
+
+        # Latency histograms for API calls, extraction and writes, plus the
+        # totals below, exportable while the scrape runs (see metrics.py)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+        self.metrics.add_collector(self._metric_gauges)
+        if post_pipeline is not None and post_pipeline.metrics is None:
+            post_pipeline.metrics = self.metrics
+
+        # Optional persistent state (a CrawlState or a path to its SQLite file)
+        # used to resume an interrupted crawl without repeating API calls. It
+        # is committed at checkpoints when records stream to sinks, otherwise
+        # only once save_data() has written them
+        if isinstance(crawl_state, str):
+            crawl_state = CrawlState(crawl_state)
+        self.crawl_state = crawl_state
+        if crawl_state is not None:
+            for name, value in crawl_state.load_counters().items():
+                if name in PERSISTED_COUNTERS:
+                    setattr(self, name, int(value))
+            logger.info(f"Resuming crawl state from {crawl_state.path}: "
+                        f"{self.total_posts_scraped} posts, {self.total_comments_scraped} comments so far")
+
+        # Orders and trims overlapping listings using what they returned last time
+        self.source_planner = SourcePlanner(crawl_state)
+
+        # Optional AuthorProfileCache (or a path to its SQLite file) that fills
+        # unresolved age/gender from what the same author stated elsewhere
+        if isinstance(author_profiles, str):
+            author_profiles = AuthorProfileCache(author_profiles)
+        self.author_profiles = author_profiles
+
+        # Seconds the old fixed time.sleep() policy would have spent, for comparison
+        self.fixed_sleep_equivalent = 0.0
+
+        # Every API call goes through the limiter; it is shared by all worker
+        # threads and paces calls to the quota reported by the client
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            limits=lambda: self._client().auth.limits,
+            retry_on=RETRYABLE_ERRORS
+        )
+
+        # An injected client (e.g. a local fake) is shared across threads;
+        # otherwise each worker thread gets its own praw.Reddit instance,
+        # created on first use so constructing a scraper costs nothing
+        self._owns_client = reddit is None
+        self._thread_local = threading.local()
+        self._reddit = reddit
+        self._client_lock = threading.Lock()
+
+        # Subreddits whose connection test passed; each is checked once per session
+        self._connected = set()
+
+    @property
+    def reddit(self):
+        """The shared Reddit client, created on first access"""
+        if self._reddit is None:
+            with self._client_lock:
+                if self._reddit is None:
+                    try:
+                        self._reddit = self._create_reddit()
+                        logger.info("Reddit API initialized successfully!")
+                    except Exception as e:
+                        logger.error(f"Failed to initialize Reddit API: {e}")
+                        raise
+        return self._reddit
+
+    @reddit.setter
+    def reddit(self, reddit):
+        self._reddit = reddit
+
+    def _create_reddit(self):
+        """Build a praw.Reddit client from the configured credentials"""
         user_agent = f"python:personalfinance_scraper:v1.0 (by /u/{self.reddit_username})"
+        return praw.Reddit(
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            user_agent=user_agent
+        )
 
-        try:
-            self.reddit = praw.Reddit(
-                client_id=self.client_id,
-                client_secret=self.client_secret,
-                user_agent=user_agent
-            )
-            logger.info("Reddit API initialized successfully!")
-        except Exception as e:
-            logger.error(f"Failed to initialize Reddit API: {e}")
-            raise
+    def _client(self):
+        """Reddit client for the calling thread, since PRAW is not thread-safe"""
+        if not self._owns_client or threading.current_thread() is threading.main_thread():
+            return self.reddit
+
+        reddit = getattr(self._thread_local, 'reddit', None)
+        if reddit is None:
+            reddit = self._thread_local.reddit = self._create_reddit()
+        return reddit
+
+    def _api_call(self):
+        """Wait for the rate limiter and count one API call"""
+        waited = self.rate_limiter.acquire()
+        self.metrics.observe('rate_limit_wait_seconds', waited or 0.0)
+        with self._stats_lock:
+            self.api_calls_made += 1
+
+    def _timed(self, call_type, func, *args, **kwargs):
+        """Run an API request through the limiter's retries, recording its latency by call type"""
+        attempts = 0
+
+        def attempt():
+            # The limiter paces each retry; count it as another API call
+            nonlocal attempts
+            attempts += 1
+            if attempts > 1:
+                with self._stats_lock:
+                    self.api_calls_made += 1
+            return func(*args, **kwargs)
+
+        with self.metrics.timer('api_call_seconds', call=call_type):
+            return self.rate_limiter.call(attempt)
+
+    def _metric_gauges(self):
+        """Totals exported with the metrics"""
+        gauges = {name: getattr(self, name) for name in PERSISTED_COUNTERS}
+        gauges['rate_limit_wait_seconds_total'] = getattr(self.rate_limiter, 'total_wait', 0.0)
+        gauges['rate_limit_backoff_seconds_total'] = getattr(self.rate_limiter, 'backoff_wait', 0.0)
+        gauges['rate_limit_retries'] = getattr(self.rate_limiter, 'retries', 0)
+        if self.post_pipeline is not None:
+            for name, value in self.post_pipeline.stats().items():
+                gauges[f"post_pipeline_{name}"] = value
+        return gauges
+
+    def _paced(self, listing):
+        """Iterate a PRAW listing, passing each page request through the rate limiter"""
+        iterator = iter(listing)
+        count = 0
+        while True:
+            try:
+                if count % LISTING_PAGE_SIZE == 0:
+                    # This item starts a new page, fetched from the API
+                    self._api_call()
+                    item = self._timed('listing_page', next, iterator)
+                else:
+                    item = self.rate_limiter.call(next, iterator)
+            except StopIteration:
+                return
+            count += 1
+            yield item
 
-    def test_connection(self):
-        """Test Reddit API connection"""
+    def post_records(self):
+        """Empty column store for the posts a scrape method keeps in memory"""
+        return RecordColumns(POST_COLUMNS if self.keep_records else RETAINED_POST_COLUMNS)
+
+    def _count_post(self, post_data):
+        """Update post counters; scrape methods may run on several threads at once"""
+        with self._stats_lock:
+            self.total_posts_scraped += 1
+            if post_data.get('age') is not None and not post_data.get('age_gender_inferred'):
+                self.posts_with_age_gender += 1
+
+    def _open_post_stream(self):
+        """Per-loop stream into the post pipeline, or None to build records inline"""
+        return self.post_pipeline.stream() if self.post_pipeline is not None else None
+
+    def _submit_post(self, stream, post, subreddit_name):
+        """Hand a post to the processing stage; returns the records that are ready, in order"""
+        if stream is None:
+            post_data = self.process_post(post, subreddit_name)
+            return [post_data] if post_data else []
+        return self._finish_posts(stream.put(raw_post(post, subreddit_name or self.subreddit_name)))
+
+    def _drain_posts(self, stream):
+        """Wait for the posts still being processed"""
+        return self._finish_posts(stream.drain()) if stream is not None else []
+
+    def _finish_posts(self, records):
+        ready = [post_data for post_data in records if post_data is not None]
+        if len(ready) < len(records):
+            logger.error(f"Error processing {len(records) - len(ready)} posts")
+        for post_data in ready:
+            self._fill_from_profile(post_data, 'author', 'gender', 'age', 'created_date', 'age_gender_inferred')
+            if self.post_sink is not None:
+                self.post_sink.write(post_data)
+        return ready
+
+    def _fill_from_profile(self, record, author_key, gender_key, age_key, date_key, inferred_key):
+        """Resolve a record's missing age/gender from its author's profile, if there is a cache"""
+        if self.author_profiles is None:
+            return
+        if self.author_profiles.fill(record, author_key, gender_key, age_key, date_key, inferred_key):
+            with self._stats_lock:
+                self.profile_fills += 1
+
+    def stream_to(self, filename_prefix='reddit_data', format='csv', flush_every=500,
+                  flush_interval=30.0, keep_records=False):
+        """Stream posts and comments to timestamped files as they are scraped"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        extension = SINK_FORMATS.get(format, '')
+        self.post_sink = StreamingSink(
+            f"{filename_prefix}_posts_{timestamp}{extension}", POST_COLUMNS,
+            format=format, flush_every=flush_every, flush_interval=flush_interval, metrics=self.metrics)
+        self.comment_sink = StreamingSink(
+            f"{filename_prefix}_comments_{timestamp}{extension}", COMMENT_COLUMNS,
+            format=format, flush_every=flush_every, flush_interval=flush_interval, metrics=self.metrics)
+        self.keep_records = keep_records
+        logger.info(f"Streaming records to {self.post_sink.path} and {self.comment_sink.path}")
+
+    def close_sinks(self):
+        """Flush and close any streaming sinks"""
+        for sink in (self.post_sink, self.comment_sink):
+            if sink is not None:
+                sink.close()
+
+    def _seen(self, kind):
+        """
+        Compact IdBitmap of the IDs already harvested, loaded from the crawl
+        state if there is one; every scrape path uses it for its seen-set
+        """
+        return IdBitmap(self.crawl_state.seen_ids(kind) if self.crawl_state is not None else ())
+
+    def _mark_seen(self, kind, item_ids):
+        if self.crawl_state is not None:
+            with self._state_lock:
+                self.crawl_state.mark_seen(kind, item_ids)
+
+    def _mark_post_seen(self, post_id, created_utc):
+        if self.crawl_state is not None:
+            with self._state_lock:
+                self.crawl_state.mark_seen('post', post_id)
+                self.crawl_state.remember_post(post_id, created_utc)
+
+    def _open_listing(self, source_name, listing_method, limit, **kwargs):
+        """
+        Start a listing, resuming after the last item consumed by an interrupted
+        read in a previous run. Returns (listing, consumed), or (None, consumed)
+        if that read already covered this run's limit.
+        """
+        after, consumed = None, 0
+        if self.crawl_state is not None:
+            after, consumed = self.crawl_state.get_cursor(source_name)
+
+        if limit is not None:
+            if consumed >= limit:
+                # Covered already; the next run reads the listing from the top
+                self._clear_cursor(source_name)
+                return None, consumed
+            limit -= consumed
+
+        if after:
+            logger.info(f"Resuming {source_name} after {after} ({consumed} items already consumed)")
+            kwargs['params'] = {'after': after}
+        return listing_method(limit=limit, **kwargs), consumed
+
+    def _advance_cursor(self, source_name, post_id, consumed):
+        if self.crawl_state is not None:
+            with self._state_lock:
+                self.crawl_state.set_cursor(source_name, f"t3_{post_id}", consumed)
+
+    def _clear_cursor(self, source_name):
+        """Forget a listing's position once it has been read to the end or its limit"""
+        if self.crawl_state is not None:
+            self.crawl_state.clear_cursor(source_name)
+
+    def checkpoint(self):
+        """
+        Flush streamed records, then persist counters and crawl state. Without
+        both sinks the records only exist in memory, so the crawl state stays
+        uncommitted until save_data() has written them.
+        """
+        with self._state_lock:
+            for sink in (self.post_sink, self.comment_sink):
+                if sink is not None:
+                    sink.flush()
+            if self.author_profiles is not None:
+                self.author_profiles.checkpoint()
+            if self.crawl_state is not None and self._streams_records():
+                self._commit_crawl_state()
+
+    def _streams_records(self):
+        """True when every record is written to a sink as it is built"""
+        return self.post_sink is not None and self.comment_sink is not None
+
+    def _commit_crawl_state(self):
+        self.crawl_state.save_counters({name: getattr(self, name) for name in PERSISTED_COUNTERS})
+        self.crawl_state.checkpoint()
+
+    def test_connection(self, subreddit_name=None, force=False):
+        """
+        Test Reddit API connection. A subreddit that passed is not checked
+        again in this session unless force=True; failures are always retried.
+        """
+        subreddit_name = subreddit_name or self.subreddit_name
+        if subreddit_name in self._connected and not force:
+            return True
         try:
-            subreddit = self.reddit.subreddit('personalfinance')
-            subscribers = subreddit.subscribers
-            logger.info(f"Connection test successful. r/personalfinance has {subscribers:,} subscribers")
+            subreddit = self._client().subreddit(subreddit_name)
+            self._api_call()
+            subscribers = self._timed('subreddit_about', getattr, subreddit, 'subscribers')
+            logger.info(f"Connection test successful. r/{subreddit_name} has {subscribers:,} subscribers")
+            self._connected.add(subreddit_name)
             return True
         except Exception as e:
             logger.error(f"Connection test failed: {e}")
@@ -115,12 +443,52 @@ class ImprovedRedditScraper:
         print()
         print("POSTS:")
         print(f"  Total Posts Scraped: {self.total_posts_scraped:,}")
-        print(f"  Posts with Age/Gender: {self.posts_with_age_gender:,} ({(self.posts_with_age_gender/self.total_posts_scraped*100) if self.total_posts_scraped > 0 else 0:.1f}%)")
+        print(f"  Posts with Stated Age/Gender: {self.posts_with_age_gender:,} ({(self.posts_with_age_gender/self.total_posts_scraped*100) if self.total_posts_scraped > 0 else 0:.1f}%)")
         print()
         print("COMMENTS:")
         print(f"  Total Comments Scraped: {self.total_comments_scraped:,}")
-        print(f"  Comments with Age/Gender: {self.comments_with_age_gender:,} ({(self.comments_with_age_gender/self.total_comments_scraped*100) if self.total_comments_scraped > 0 else 0:.1f}%)")
+        print(f"  Comments with Stated Age/Gender: {self.comments_with_age_gender:,} ({(self.comments_with_age_gender/self.total_comments_scraped*100) if self.total_comments_scraped > 0 else 0:.1f}%)")
+        if self.author_profiles is not None:
+            print(f"  Filled from Author Profiles: {self.profile_fills:,} posts and comments "
+                  f"({self.author_profiles.hits:,} cache hits, {self.author_profiles.misses:,} lookups)")
+        if self.more_comments_calls:
+            print(f"  MoreComments Expansions: {self.more_comments_calls:,} calls, "
+                  f"{self.more_comments_gained:,} comments "
+                  f"({self.more_comments_gained / self.more_comments_calls:.1f} per call)")
         print()
+        print("RATE LIMITING:")
+        rate_limit_wait = getattr(self.rate_limiter, 'total_wait', 0.0)
+        print(f"  Time Spent Waiting: {rate_limit_wait:.1f} seconds")
+        print(f"  Fixed-Sleep Policy Would Wait: {self.fixed_sleep_equivalent:.1f} seconds")
+        print(f"  Time Saved: {self.fixed_sleep_equivalent - rate_limit_wait:.1f} seconds")
+        print()
+        if self.post_pipeline is not None:
+            pipeline = self.post_pipeline.stats()
+            print("POST PIPELINE:")
+            print(f"  Queue Depth: {pipeline['queue_depth']:,} now, {pipeline['max_queue_depth']:,} max")
+            print(f"  Fetch Stage: {pipeline['fetch_rate']:.1f} posts/sec "
+                  f"({pipeline['blocked_seconds']:.1f}s blocked on a full queue)")
+            print(f"  Build Stage: {pipeline['build_rate']:.1f} posts/sec per worker, "
+                  f"{pipeline['failed']:,} failed")
+            print()
+        source_yield = self.source_planner.report()
+        if source_yield:
+            print("SOURCE YIELD (new unique posts per listing page):")
+            for source, listing in source_yield.items():
+                pages = ' '.join(str(new) for new in listing['new_per_page'])
+                print(f"  {source:<40} {listing['new']:>6,} new of {listing['items']:>6,} "
+                      f"({listing['new_per_call']:.1f} per call): {pages}")
+            print()
+        histograms = self.metrics.histograms()
+        if histograms:
+            print("WHERE TIME GOES:")
+            print(f"  {'metric':<44} {'count':>8} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+            for (name, labels), histogram in sorted(histograms.items(), key=lambda item: -item[1].sum):
+                label = name + ''.join(f"[{value}]" for _, value in labels)
+                print(f"  {label:<44} {histogram.count:>8,} {histogram.sum:>9.2f} "
+                      f"{histogram.sum / histogram.count * 1000 if histogram.count else 0:>9.2f} "
+                      f"{histogram.quantile(0.95) * 1000:>9.2f} {histogram.max * 1000:>9.2f}")
+            print()
         print("EFFICIENCY:")
         if elapsed_time > 0:
             print(f"  Posts per Minute: {(self.total_posts_scraped / elapsed_minutes):.1f}")
@@ -128,114 +496,140 @@ class ImprovedRedditScraper:
             print(f"  Total Data Points per Minute: {((self.total_posts_scraped + self.total_comments_scraped) / elapsed_minutes):.1f}")
         print("="*60)
 
-    def scrape_multiple_sources(self, target_posts=5000, batch_size=100):
+    def scrape_multiple_sources(self, target_posts=5000, batch_size=100, subreddit_name=None,
+                                source_weights=None):
         """
         Scrape from multiple sources to get more posts:
         - Hot posts
         - New posts  
         - Top posts from different time periods
+        source_weights optionally scales each source's limit by name
+        (e.g. {'rising': 0.5, 'controversial_month': 0} halves rising and skips controversial).
+        Sources are then reordered and trimmed by the source planner, using
+        how much they overlapped last time, to maximise new posts per API call.
         """
         self.start_time = time.time()
+        subreddit_name = subreddit_name or self.subreddit_name
+        source_weights = source_weights or {}
         
-        if not self.test_connection():
+        if not self.test_connection(subreddit_name):
             return []
 
-        subreddit = self.reddit.subreddit('personalfinance')
-        all_posts = []
-        seen_ids = set()
+        subreddit = self._client().subreddit(subreddit_name)
+        all_posts = self.post_records()
+        seen_ids = self._seen('post')
         
-        # Define different sources with higher limits for 5000 posts
+        # Define different sources with higher limits for 5000 posts:
+        # (name, listing method, limit, listing arguments)
         sources = [
-            ('hot', lambda: subreddit.hot(limit=1500)),
-            ('new', lambda: subreddit.new(limit=1500)), 
-            ('top_week', lambda: subreddit.top(time_filter='week', limit=800)),
-            ('top_month', lambda: subreddit.top(time_filter='month', limit=800)),
-            ('top_year', lambda: subreddit.top(time_filter='year', limit=800)),
-            ('top_all', lambda: subreddit.top(time_filter='all', limit=800)),
-            ('rising', lambda: subreddit.rising(limit=500)),
-            ('controversial_month', lambda: subreddit.controversial(time_filter='month', limit=300)),
+            ('hot', subreddit.hot, 1500, {}),
+            ('new', subreddit.new, 1500, {}),
+            ('top_week', subreddit.top, 800, {'time_filter': 'week'}),
+            ('top_month', subreddit.top, 800, {'time_filter': 'month'}),
+            ('top_year', subreddit.top, 800, {'time_filter': 'year'}),
+            ('top_all', subreddit.top, 800, {'time_filter': 'all'}),
+            ('rising', subreddit.rising, 500, {}),
+            ('controversial_month', subreddit.controversial, 300, {'time_filter': 'month'}),
         ]
+        sources = [(name, method, int(limit * source_weights.get(name, 1.0)), kwargs)
+                   for name, method, limit, kwargs in sources]
+        sources = [source for source in sources if source[2] > 0]
+        plan = self.source_planner.plan([f"{subreddit_name}/{source[0]}" for source in sources],
+                                        [source[2] for source in sources])
         
-        for source_name, source_func in sources:
+        stream = self._open_post_stream()
+        for index, limit, estimate in plan:
             if len(all_posts) >= target_posts:
                 break
+
+            source_name, listing_method, _, listing_kwargs = sources[index]
+            if estimate is not None:
+                logger.info(f"Planned {source_name}: up to {limit} items, ~{estimate:.0f} new posts per call")
                 
-            logger.info(f"Scraping from {source_name}...")
+            logger.info(f"Scraping r/{subreddit_name} from {source_name}...")
+            state_key = f"{subreddit_name}/{source_name}"
+            batch_count = 0
+            exhausted = resumed = False
+            progress = ListingProgress(self, state_key)
+            self.source_planner.start(state_key)
+
+            def collect(ready):
+                nonlocal batch_count
+                checkpoint_due = False
+                for post_data in ready:
+                    all_posts.append(post_data)
+                    batch_count += 1
+                    self._count_post(post_data)
+
+                    # Progress update
+                    if batch_count % batch_size == 0:
+                        logger.info(f"r/{subreddit_name} {source_name}: {batch_count} posts processed, {len(all_posts)} total")
+                        logger.info(f"Running totals: {self.total_posts_scraped} posts, {self.posts_with_age_gender} with age/gender")
+                        self.fixed_sleep_equivalent += 2
+                        checkpoint_due = True
+
+                # Posts whose records are out are now marked seen
+                progress.settle(stream.in_flight if stream else 0)
+                if checkpoint_due:
+                    collect(self._drain_posts(stream))
+                    self.checkpoint()
             
             try:
-                posts = source_func()
-                self.api_calls_made += 1
-                batch_count = 0
+                posts, progress.consumed = self._open_listing(state_key, listing_method, limit, **listing_kwargs)
+                resumed = progress.consumed > 0
+                if posts is None:
+                    logger.info(f"Skipping {source_name}: read up to its limit in a previous run")
+                    continue
                 
-                for post in posts:
-                    if len(all_posts) >= target_posts:
+                for post in self._paced(posts):
+                    if len(all_posts) + (stream.in_flight if stream else 0) >= target_posts:
                         break
-                        
+
                     # Skip duplicates
-                    if post.id in seen_ids:
+                    new = seen_ids.add(post.id)
+                    self.source_planner.observe(state_key, post.id, new)
+                    progress.read(post, new)
+                    if not new:
                         continue
-                    seen_ids.add(post.id)
                     
                     try:
-                        post_data = self.process_post(post)
-                        if post_data:  # Only add if we got valid data
-                            all_posts.append(post_data)
-                            batch_count += 1
-                            self.total_posts_scraped += 1
-                            
-                            # Count posts with age/gender info
-                            if post_data.get('age') is not None:
-                                self.posts_with_age_gender += 1
-                            
-                            # Progress update
-                            if batch_count % batch_size == 0:
-                                logger.info(f"{source_name}: {batch_count} posts processed, {len(all_posts)} total")
-                                logger.info(f"Running totals: {self.total_posts_scraped} posts, {self.posts_with_age_gender} with age/gender")
-                                time.sleep(2)  # Respect rate limits
-                                
+                        collect(self._submit_post(stream, post, subreddit_name))
                     except Exception as e:
                         logger.warning(f"Error processing post {post.id}: {e}")
                         continue
-                        
-                logger.info(f"Completed {source_name}: {batch_count} new posts")
-                time.sleep(3)  # Longer delay between sources
+                else:
+                    # Read to the end or to its limit, so there is nothing to resume
+                    exhausted = True
+
+                collect(self._drain_posts(stream))
+                logger.info(f"Completed r/{subreddit_name} {source_name}: {batch_count} new posts")
+                self.fixed_sleep_equivalent += 3
                 
             except Exception as e:
                 logger.error(f"Error scraping {source_name}: {e}")
                 continue
+
+            finally:
+                collect(self._drain_posts(stream))
+                if exhausted:
+                    self._clear_cursor(state_key)
+                self.source_planner.finish(state_key, resumed)
+                self.checkpoint()
                 
         return all_posts
 
-    def process_post(self, post):
+    def process_post(self, post, subreddit_name=None):
         """Process a single post and return data"""
         try:
-            post_date = datetime.fromtimestamp(post.created_utc, tz=timezone.utc)
-            
-            # Get all text content
-            title_text = post.title or ""
-            body_text = post.selftext or ""
-            combined_text = f"{title_text} {body_text}"
-            
-            # Extract age/gender
-            gender, age = extract_age_gender(combined_text)
-            
-            post_data = {
-                'post_id': post.id,
-                'title': title_text[:500],  # Limit title length
-                'text': body_text[:1000],  # Limit text length
-                'author': str(post.author) if post.author else '[deleted]',
-                'score': post.score,
-                'upvote_ratio': post.upvote_ratio,
-                'num_comments': post.num_comments,
-                'created_date': post_date.strftime('%Y-%m-%d %H:%M:%S'),
-                'url': post.url,
-                'permalink': f"https://reddit.com{post.permalink}",
-                'flair': post.link_flair_text,
-                'gender': gender,
-                'age': age,
-                'has_selftext': bool(body_text),
-                'text_length': len(combined_text)
-            }
+            extraction_times = []
+            post_data = build_post_record(raw_post(post, subreddit_name or self.subreddit_name),
+                                          extraction_times)
+            for seconds in extraction_times:
+                self.metrics.observe('extraction_seconds', seconds, kind='post')
+            self._fill_from_profile(post_data, 'author', 'gender', 'age', 'created_date', 'age_gender_inferred')
+
+            if self.post_sink is not None:
+                self.post_sink.write(post_data)
             
             return post_data
             
@@ -243,145 +637,489 @@ class ImprovedRedditScraper:
             logger.error(f"Error processing post: {e}")
             return None
     
-    def scrape_with_pagination(self, target_posts=5000):
+    def scrape_with_pagination(self, target_posts=5000, subreddit_name=None):
         """
         Alternative approach using pagination to get more posts
         """
         if not self.start_time:
             self.start_time = time.time()
+        subreddit_name = subreddit_name or self.subreddit_name
             
-        if not self.test_connection():
+        if not self.test_connection(subreddit_name):
             return []
             
-        subreddit = self.reddit.subreddit('personalfinance')
-        all_posts = []
+        subreddit = self._client().subreddit(subreddit_name)
+        all_posts = self.post_records()
+        seen_ids = self._seen('post')
         
-        # Try different sorting methods
-        sort_methods = ['hot', 'new', 'top']
+        # Try different sorting methods; a limit of None means get as many as possible
+        sort_methods = [
+            ('hot', subreddit.hot, {}),
+            ('new', subreddit.new, {}),
+            ('top', subreddit.top, {'time_filter': 'all'}),
+        ]
+        plan = self.source_planner.plan(
+            [f"{subreddit_name}/paginate_{sort_method}" for sort_method, _, _ in sort_methods],
+            [None] * len(sort_methods))
+        stream = self._open_post_stream()
         
-        for sort_method in sort_methods:
+        for index, limit, estimate in plan:
             if len(all_posts) >= target_posts:
                 break
+
+            sort_method, listing_method, listing_kwargs = sort_methods[index]
+            source_name = f"{subreddit_name}/paginate_{sort_method}"
+            if estimate is not None:
+                logger.info(f"Planned {sort_method}: up to {limit or 'all'} items, ~{estimate:.0f} new posts per call")
                 
             logger.info(f"Scraping using {sort_method} sorting...")
+            batch_count = 0
+            exhausted = resumed = False
+            progress = ListingProgress(self, source_name)
+            self.source_planner.start(source_name)
+
+            def collect(ready):
+                nonlocal batch_count
+                checkpoint_due = False
+                for post_data in ready:
+                    all_posts.append(post_data)
+                    batch_count += 1
+                    self._count_post(post_data)
+
+                    if batch_count % 50 == 0:
+                        logger.info(f"{sort_method}: {batch_count} posts, {len(all_posts)} total")
+                        logger.info(f"Running totals: {self.total_posts_scraped} posts, {self.posts_with_age_gender} with age/gender")
+                        self.fixed_sleep_equivalent += 1
+                        checkpoint_due = True
+
+                # Posts whose records are out are now marked seen
+                progress.settle(stream.in_flight if stream else 0)
+                if checkpoint_due:
+                    collect(self._drain_posts(stream))
+                    self.checkpoint()
             
             try:
-                if sort_method == 'hot':
-                    posts = subreddit.hot(limit=None)  # None means get as many as possible
-                elif sort_method == 'new':
-                    posts = subreddit.new(limit=None)
-                else:  # top
-                    posts = subreddit.top(time_filter='all', limit=None)
+                posts, progress.consumed = self._open_listing(source_name, listing_method, limit, **listing_kwargs)
+                resumed = progress.consumed > 0
+                if posts is None:
+                    logger.info(f"Skipping {sort_method}: read up to its limit in a previous run")
+                    continue
                 
-                self.api_calls_made += 1
-                batch_count = 0
-                for post in posts:
-                    if len(all_posts) >= target_posts:
+                for post in self._paced(posts):
+                    if len(all_posts) + (stream.in_flight if stream else 0) >= target_posts:
                         break
+
+                    # Skip duplicates across sort methods and earlier runs
+                    new = seen_ids.add(post.id)
+                    self.source_planner.observe(source_name, post.id, new)
+                    progress.read(post, new)
+                    if not new:
+                        continue
                         
                     try:
-                        post_data = self.process_post(post)
-                        if post_data:
-                            all_posts.append(post_data)
-                            batch_count += 1
-                            self.total_posts_scraped += 1
-                            
-                            # Count posts with age/gender info
-                            if post_data.get('age') is not None:
-                                self.posts_with_age_gender += 1
-                            
-                            if batch_count % 50 == 0:
-                                logger.info(f"{sort_method}: {batch_count} posts, {len(all_posts)} total")
-                                logger.info(f"Running totals: {self.total_posts_scraped} posts, {self.posts_with_age_gender} with age/gender")
-                                time.sleep(1)  # Rate limiting
-                                
+                        collect(self._submit_post(stream, post, subreddit_name))
                     except Exception as e:
                         logger.warning(f"Error with post: {e}")
                         continue
-                        
+                else:
+                    exhausted = True
+
+                collect(self._drain_posts(stream))
                 logger.info(f"Completed {sort_method}: {batch_count} posts")
                 
             except Exception as e:
                 logger.error(f"Error with {sort_method} sorting: {e}")
                 continue
+
+            finally:
+                collect(self._drain_posts(stream))
+                if exhausted:
+                    self._clear_cursor(source_name)
+                self.source_planner.finish(source_name, resumed)
+                self.checkpoint()
                 
         return all_posts
 
-    def get_limited_comments(self, post_id, max_comments=5):
+    def scrape_incremental(self, new_limit=1000, refresh_hours=24, subreddit_name=None):
+        """
+        Harvest only what appeared since the last run:
+        - page through subreddit.new until reaching the newest post seen last time
+        - refresh score, num_comments and upvote_ratio of posts created in the
+          last refresh_hours (see refresh_recent_posts)
+        Watermarks live in the crawl state, so configure one to persist them;
+        like seen IDs they are committed once the new posts are written.
+        Returns (new_posts, refreshed).
+        """
+        if not self.start_time:
+            self.start_time = time.time()
+
+        watermarks = self.crawl_state
+        if watermarks is None:
+            logger.warning("No crawl state configured; incremental watermarks will not persist")
+            watermarks = CrawlState(':memory:')
+
+        subreddit_name = subreddit_name or self.subreddit_name
+        if not self.test_connection(subreddit_name):
+            return [], []
+
+        subreddit = self._client().subreddit(subreddit_name)
+        seen_ids = self._seen('post')
+        watermark_key = f"{subreddit_name}/new"
+        newest_created, newest_id = watermarks.get_watermark(watermark_key)
+        top_created, top_id = newest_created, newest_id
+        new_posts = self.post_records()
+        reached_watermark = False
+        stream = self._open_post_stream()
+        progress = ListingProgress(self)
+
+        def collect(ready):
+            for post_data in ready:
+                new_posts.append(post_data)
+                self._count_post(post_data)
+            progress.settle(stream.in_flight if stream else 0)
+
+        logger.info(f"Incremental scrape of r/{subreddit_name} new posts since {newest_id or 'the beginning'}...")
+
+        try:
+            for post in self._paced(subreddit.new(limit=new_limit)):
+                # /new is ordered newest first, so everything from here on was seen before
+                if newest_created is not None and (post.id == newest_id or post.created_utc < newest_created):
+                    reached_watermark = True
+                    break
+
+                if top_created is None or post.created_utc > top_created:
+                    top_created, top_id = post.created_utc, post.id
+
+                if not seen_ids.add(post.id):
+                    continue
+                progress.read(post, True)
+
+                collect(self._submit_post(stream, post, subreddit_name))
+
+        except Exception as e:
+            # Keep the old watermark so the next run covers the gap
+            logger.error(f"Error during incremental scrape of new posts: {e}")
+        else:
+            if newest_created is not None and not reached_watermark:
+                logger.warning(f"Did not reach the previous watermark within {new_limit} posts; "
+                               f"some posts may have been missed")
+            if top_id is not None:
+                watermarks.set_watermark(watermark_key, top_created, top_id)
+        finally:
+            collect(self._drain_posts(stream))
+
+        logger.info(f"Incremental scrape found {len(new_posts)} new posts")
+
+        refreshed = self.refresh_recent_posts(hours=refresh_hours)
+        self.checkpoint()
+        return new_posts, refreshed
+
+    def refresh_recent_posts(self, hours=24):
+        """
+        Re-read score, num_comments and upvote_ratio for harvested posts created
+        in the last `hours`, fetching up to 100 posts per API call.
+        """
+        if self.crawl_state is None:
+            return []
+
+        post_ids = self.crawl_state.recent_posts(time.time() - hours * 3600)
+        refreshed = []
+
+        for start in range(0, len(post_ids), LISTING_PAGE_SIZE):
+            fullnames = [f"t3_{post_id}" for post_id in post_ids[start:start + LISTING_PAGE_SIZE]]
+            self._api_call()
+            try:
+                submissions = self._timed('info', lambda: list(self._client().info(fullnames=fullnames)))
+            except Exception as e:
+                logger.warning(f"Error refreshing {len(fullnames)} posts: {e}")
+                continue
+
+            refreshed_date = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+            for submission in submissions:
+                refreshed.append({
+                    'post_id': submission.id,
+                    'score': submission.score,
+                    'num_comments': submission.num_comments,
+                    'upvote_ratio': submission.upvote_ratio,
+                    'refreshed_date': refreshed_date
+                })
+
+        logger.info(f"Refreshed {len(refreshed)} posts from the last {hours} hours")
+        return refreshed
+
+    def _comment_record(self, comment, post_id, subreddit_name=None):
+        """Build the output record for a comment, or None for deleted/removed ones"""
+        if not hasattr(comment, 'body') or comment.body in ['[deleted]', '[removed]']:
+            return None
+        comment_date = datetime.fromtimestamp(comment.created_utc, tz=timezone.utc)
+        with self.metrics.timer('extraction_seconds', kind='comment'):
+            gender, age = extract_age_gender(comment.body)
+        return {
+            'comment_id': comment.id,
+            'post_id': post_id,
+            'comment_parent_id': comment.parent_id,
+            'comment_body': comment.body[:500],
+            'comment_author': str(comment.author) if comment.author else '[deleted]',
+            'comment_score': comment.score,
+            'comment_created_date': comment_date.strftime('%Y-%m-%d %H:%M:%S'),
+            'comment_gender': gender,
+            'comment_age': age,
+            'comment_age_gender_inferred': False,
+            'subreddit': subreddit_name or self.subreddit_name
+        }
+
+    def _store_comments(self, post_id, comments, subreddit_name=None):
+        """Turn fetched comments into records, write them to the sink and update the counters"""
+        comments_data = []
+        comments_with_age_gender = 0
+        for comment in comments:
+            if self.crawl_state is not None and self.crawl_state.is_seen('comment', comment.id):
+                continue
+            comment_data = self._comment_record(comment, post_id, subreddit_name)
+            if comment_data is None:
+                continue
+            self._fill_from_profile(comment_data, 'comment_author', 'comment_gender', 'comment_age',
+                                    'comment_created_date', 'comment_age_gender_inferred')
+            comments_data.append(comment_data)
+            if self.comment_sink is not None:
+                self.comment_sink.write(comment_data)
+
+            # Count comments with age/gender info stated in their own text
+            if comment_data['comment_age'] is not None and not comment_data['comment_age_gender_inferred']:
+                comments_with_age_gender += 1
+
+        with self._stats_lock:
+            self.total_comments_scraped += len(comments_data)
+            self.comments_with_age_gender += comments_with_age_gender
+
+        self._mark_seen('comment', [comment['comment_id'] for comment in comments_data])
+        self._mark_seen('comments_of', post_id)
+        return comments_data
+
+    def get_limited_comments(self, post_id, max_comments=5, subreddit_name=None):
         """Get a limited number of comments for a post"""
+        # Comments for this post were already harvested in an earlier run
+        if self.crawl_state is not None and self.crawl_state.is_seen('comments_of', post_id):
+            return []
+
         try:
-            post = self.reddit.submission(id=post_id)
-            self.api_calls_made += 1
-            post.comments.replace_more(limit=0)  # Don't expand MoreComments
-            
-            comments_data = []
-            for i, comment in enumerate(post.comments[:max_comments]):
-                if hasattr(comment, 'body') and comment.body not in ['[deleted]', '[removed]']:
-                    comment_date = datetime.fromtimestamp(comment.created_utc, tz=timezone.utc)
-                    gender, age = extract_age_gender(comment.body)
-                    
-                    comment_data = {
-                        'comment_id': comment.id,
-                        'post_id': post_id,
-                        'comment_body': comment.body[:500],
-                        'comment_author': str(comment.author) if comment.author else '[deleted]',
-                        'comment_score': comment.score,
-                        'comment_created_date': comment_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'comment_gender': gender,
-                        'comment_age': age
-                    }
-                    comments_data.append(comment_data)
-                    self.total_comments_scraped += 1
-                    
-                    # Count comments with age/gender info
-                    if age is not None:
-                        self.comments_with_age_gender += 1
-                    
-            return comments_data
-            
+            post = self._client().submission(id=post_id)
+            self._api_call()
+            # Accessing comments fetches the submission; don't expand MoreComments
+            comments = self._timed('submission', getattr, post, 'comments')
+            self._timed('replace_more', comments.replace_more, limit=0)
+            return self._store_comments(post_id, post.comments[:max_comments], subreddit_name)
+
         except Exception as e:
             logger.error(f"Error getting comments for post {post_id}: {e}")
             return []
 
-    def save_data(self, posts_data, comments_data=None, filename_prefix='reddit_data'):
-        """Save data to CSV files"""
+    def _expand_more(self, post, batch):
+        """
+        Fetch the comments behind a batch of MoreComments with one request.
+        'Continue this thread' stubs have no child IDs and are loaded on their own.
+        """
+        self._api_call()
+        if len(batch) == 1 and not batch[0].children:
+            return list(self._timed('continue_thread', batch[0].comments))
+
+        children = [child for more in batch for child in more.children]
+        data = {'children': ','.join(children), 'link_id': post.fullname, 'sort': post.comment_sort}
+        comments = self._timed('morechildren', self._client().post, API_PATH['morechildren'], data=data)
+        for comment in comments:
+            comment.submission = post
+        return list(comments)
+
+    def get_comment_tree(self, post_id, max_calls=10, max_comments=500, subreddit_name=None):
+        """
+        Harvest a post's comment tree, including deep replies, within a budget of
+        max_calls extra API calls and max_comments comments per post.
+        MoreComments stubs are expanded breadth-first (shallowest level first,
+        then highest-scoring parent first). Stubs at the same level are merged
+        into one /api/morechildren request of up to 100 IDs.
+        """
+        if self.crawl_state is not None and self.crawl_state.is_seen('comments_of', post_id):
+            return []
+
+        try:
+            post = self._client().submission(id=post_id)
+            self._api_call()
+            top_level = self._timed('submission', lambda: list(post.comments))
+
+            depths = {post.fullname: 0}
+            scores = {post.fullname: post.score}
+            pending = []
+            order = itertools.count()
+            found = []
+
+            def walk(items):
+                queue = deque(items)
+                while queue and len(found) < max_comments:
+                    item = queue.popleft()
+                    parent_depth = depths.get(item.parent_id, 0)
+                    if isinstance(item, MoreComments):
+                        heapq.heappush(pending, (parent_depth + 1, -scores.get(item.parent_id, 0),
+                                                 next(order), item))
+                        continue
+                    depths[item.fullname] = parent_depth + 1
+                    scores[item.fullname] = item.score
+                    found.append(item)
+                    queue.extend(item.replies)
+
+            walk(top_level)
+            calls = 0
+            while pending and calls < max_calls and len(found) < max_comments:
+                depth, _, _, more = heapq.heappop(pending)
+                batch = [more]
+                if more.children:
+                    size = len(more.children)
+                    while (pending and pending[0][0] == depth and pending[0][3].children
+                           and size + len(pending[0][3].children) <= MORECHILDREN_BATCH):
+                        size += len(pending[0][3].children)
+                        batch.append(heapq.heappop(pending)[3])
+
+                before = len(found)
+                walk(self._expand_more(post, batch))
+                calls += 1
+                with self._stats_lock:
+                    self.more_comments_calls += 1
+                    self.more_comments_gained += len(found) - before
+
+            logger.debug(f"Post {post_id}: {len(found)} comments with {calls} expansion calls, "
+                         f"{len(pending)} MoreComments left unexpanded")
+            return self._store_comments(post_id, found, subreddit_name)
+
+        except Exception as e:
+            logger.error(f"Error getting comment tree for post {post_id}: {e}")
+            return []
+
+    @staticmethod
+    def _frame(records):
+        """DataFrame of a RecordColumns store (column by column) or a list of record dicts"""
+        return records.to_frame() if isinstance(records, RecordColumns) else pd.DataFrame(records)
+
+    @classmethod
+    def _typed_frame(cls, records, columns, date_column):
+        """DataFrame with the record dtypes and a real datetime column"""
+        frame = cls._frame(records)
+        frame = frame.astype({column: dtype for column, dtype in columns.items() if column in frame.columns})
+        frame[date_column] = pd.to_datetime(frame[date_column], format='%Y-%m-%d %H:%M:%S')
+        return frame
+
+    def save_data(self, posts_data, comments_data=None, filename_prefix='reddit_data', format='csv'):
+        """
+        Save data to CSV files, or with format='parquet' to Parquet datasets
+        partitioned by created day (and flair for posts). With keep_records=False
+        the full records were streamed to the sinks and only a few fields are
+        in memory, so posts are not written again here.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         posts_df = None
         comments_df = None
+
+        if format == 'parquet':
+            from parquet_io import write_partitioned
         
-        if posts_data:
-            posts_df = pd.DataFrame(posts_data)
-            posts_filename = f"{filename_prefix}_posts_{timestamp}.csv"
-            posts_df.to_csv(posts_filename, index=False)
+        if posts_data and not self.keep_records:
+            logger.info("Posts were streamed to the post sink; not writing them again")
+        elif posts_data:
+            if format == 'parquet':
+                posts_df = self._typed_frame(posts_data, POST_COLUMNS, 'created_date')
+                posts_filename = f"{filename_prefix}_posts_{timestamp}"
+                # Partition keys are separate columns so a missing flair stays
+                # null in the data while still getting a readable partition
+                with self.metrics.timer('file_write_seconds', kind='posts', format=format):
+                    write_partitioned(
+                        posts_df.assign(
+                            created_day=posts_df['created_date'].dt.strftime('%Y-%m-%d'),
+                            flair_partition=posts_df['flair'].fillna('No Flair')),
+                        posts_filename, ['created_day', 'flair_partition'])
+            else:
+                posts_df = self._frame(posts_data)
+                posts_filename = f"{filename_prefix}_posts_{timestamp}.csv"
+                with self.metrics.timer('file_write_seconds', kind='posts', format='csv'):
+                    posts_df.to_csv(posts_filename, index=False)
             logger.info(f"Posts saved to {posts_filename}")
             
         if comments_data:
-            comments_df = pd.DataFrame(comments_data)
-            comments_filename = f"{filename_prefix}_comments_{timestamp}.csv"
-            comments_df.to_csv(comments_filename, index=False)
+            if format == 'parquet':
+                comments_df = self._typed_frame(comments_data, COMMENT_COLUMNS, 'comment_created_date')
+                comments_filename = f"{filename_prefix}_comments_{timestamp}"
+                with self.metrics.timer('file_write_seconds', kind='comments', format=format):
+                    write_partitioned(
+                        comments_df.assign(
+                            created_day=comments_df['comment_created_date'].dt.strftime('%Y-%m-%d')),
+                        comments_filename, ['created_day'])
+            else:
+                comments_df = self._frame(comments_data)
+                comments_filename = f"{filename_prefix}_comments_{timestamp}.csv"
+                with self.metrics.timer('file_write_seconds', kind='comments', format='csv'):
+                    comments_df.to_csv(comments_filename, index=False)
             logger.info(f"Comments saved to {comments_filename}")
+
+        # The records are on disk now, so the IDs marked seen can be committed
+        if self.crawl_state is not None:
+            with self._state_lock:
+                self._commit_crawl_state()
             
         # Print final statistics
         self.print_stats()
         
         return posts_df, comments_df
 
-    def scrape_posts_and_comments(self, target_posts=5000, comments_per_post=5):
+    def _comment_fetcher(self, comments_per_post, tree_calls, subreddit_name):
+        """
+        Per-post comment function: the first comments_per_post top-level comments,
+        or with tree_calls set, the full tree within tree_calls expansion calls
+        """
+        if tree_calls is None:
+            return lambda post_id: self.get_limited_comments(post_id, comments_per_post, subreddit_name)
+        return lambda post_id: self.get_comment_tree(post_id, tree_calls, comments_per_post, subreddit_name)
+
+    def fetch_comments_concurrently(self, post_ids, comments_per_post=5, max_workers=8,
+                                    subreddit_name=None, tree_calls=None):
+        """
+        Fetch comments for many posts on a thread pool. All workers share
+        self.rate_limiter, and results come back in post order so the output
+        matches the serial loop in scrape_posts_and_comments.
+        """
+        comments = RecordColumns(COMMENT_COLUMNS)
+        fetch = self._comment_fetcher(comments_per_post, tree_calls, subreddit_name)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='comments') as executor:
+            for i, post_comments in enumerate(executor.map(fetch, post_ids)):
+                if self.keep_records:
+                    comments.extend(post_comments)
+
+                if (i + 1) % 10 == 0:
+                    logger.info(f"Processed {i + 1}/{len(post_ids)} posts for comments")
+                    logger.info(f"Comments collected so far: {self.total_comments_scraped}")
+                    self.fixed_sleep_equivalent += 1
+                    self.checkpoint()
+
+        self.checkpoint()
+        return comments
+
+    def scrape_posts_and_comments(self, target_posts=5000, comments_per_post=5, max_workers=1,
+                                  subreddit_name=None, tree_calls=None):
         """
-        Combined method to scrape both posts and comments with detailed counting
+        Combined method to scrape both posts and comments with detailed counting.
+        With max_workers > 1 comments are fetched concurrently. With tree_calls
+        set, whole comment trees are harvested (see get_comment_tree) and
+        comments_per_post caps the comments per post.
         """
         logger.info(f"Starting combined scraping: {target_posts} posts, {comments_per_post} comments per post")
         
         # First get posts
-        posts = self.scrape_multiple_sources(target_posts=target_posts)
+        posts = self.scrape_multiple_sources(target_posts=target_posts, subreddit_name=subreddit_name)
         
         if not posts:
             logger.error("No posts collected, skipping comment collection")
             return posts, []
             
         # Then get comments for posts with age/gender info (more valuable)
-        comments = []
+        comments = RecordColumns(COMMENT_COLUMNS)
         posts_for_comments = [p for p in posts if p.get('age') is not None]
         
         if not posts_for_comments:
@@ -389,26 +1127,66 @@ class ImprovedRedditScraper:
             posts_for_comments = sorted(posts, key=lambda x: x.get('score', 0), reverse=True)[:min(100, len(posts))]
         
         logger.info(f"Getting comments from {len(posts_for_comments)} selected posts...")
-        
+
+        if max_workers > 1:
+            post_ids = [post['post_id'] for post in posts_for_comments]
+            comments = self.fetch_comments_concurrently(post_ids, comments_per_post, max_workers,
+                                                        subreddit_name, tree_calls)
+            return posts, comments
+
+        fetch = self._comment_fetcher(comments_per_post, tree_calls, subreddit_name)
         for i, post in enumerate(posts_for_comments):
             try:
-                post_comments = self.get_limited_comments(post['post_id'], comments_per_post)
-                comments.extend(post_comments)
+                post_comments = fetch(post['post_id'])
+                if self.keep_records:
+                    comments.extend(post_comments)
                 
                 if (i + 1) % 10 == 0:
                     logger.info(f"Processed {i + 1}/{len(posts_for_comments)} posts for comments")
                     logger.info(f"Comments collected so far: {self.total_comments_scraped}")
-                    time.sleep(1)  # Rate limiting
+                    self.fixed_sleep_equivalent += 1
+                    self.checkpoint()
                     
             except Exception as e:
                 logger.warning(f"Error getting comments for post {post['post_id']}: {e}")
                 continue
-                
+
+        self.checkpoint()
         return posts, comments
 
+def run_incremental(state_path='crawl_state.sqlite', profiles_path='author_profiles.sqlite'):
+    """One incremental run; schedule it every few minutes, e.g. from cron"""
+    scraper = ImprovedRedditScraper(crawl_state=state_path, author_profiles=profiles_path)
+    try:
+        posts, refreshed = scraper.scrape_incremental()
+        if posts:
+            # Commits the new watermark and seen IDs once the posts are written
+            scraper.save_data(posts, filename_prefix='reddit_incremental')
+        else:
+            scraper._commit_crawl_state()
+        if refreshed:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            refresh_filename = f"reddit_incremental_refresh_{timestamp}.csv"
+            pd.DataFrame(refreshed).to_csv(refresh_filename, index=False)
+            logger.info(f"Refreshed stats saved to {refresh_filename}")
+    finally:
+        # Discards the seen IDs of posts that were not saved, so the next run collects them
+        scraper.crawl_state.close()
+        scraper.author_profiles.close()
+
 if __name__ == "__main__":
+    # Configured only when run as a script, so importing this module leaves logging alone
+    logging.basicConfig(level=logging.INFO)
+
+    # python "main file.py" --incremental
+    if '--incremental' in sys.argv:
+        run_incremental()
+        sys.exit(0)
+
     try:
-        scraper = ImprovedRedditScraper()
+        scraper = ImprovedRedditScraper(author_profiles='author_profiles.sqlite')
+        # Rewritten every 30s so a long run can be watched (node_exporter textfile format)
+        scraper.metrics.start_export('reddit_scraper_metrics.prom')
         
         # Method 1: Multiple sources
         logger.info("Starting multi-source scraping...")
@@ -423,12 +1201,15 @@ if __name__ == "__main__":
                 print("\nSample of collected posts:")
                 print(posts_df[['title', 'score', 'num_comments', 'age', 'gender', 'has_selftext']].head(10))
                 
-                # Show age/gender distribution
-                age_gender_posts = posts_df[posts_df['age'].notna()]
-                if len(age_gender_posts) > 0:
-                    print(f"\nAge/Gender Distribution ({len(age_gender_posts)} posts):")
-                    print(age_gender_posts['gender'].value_counts())
-                    print(f"Age range: {age_gender_posts['age'].min()} - {age_gender_posts['age'].max()}")
+                # Show the stated age/gender distribution from the summary cube
+                cube = AggregateCube()
+                cube.add(posts_df)
+                gender_counts = cube.value_counts('gender', known_age=True, inferred=False)
+                if gender_counts.sum() > 0:
+                    youngest, oldest = cube.age_range(inferred=False)
+                    print(f"\nAge/Gender Distribution ({gender_counts.sum()} posts):")
+                    print(gender_counts)
+                    print(f"Age range: {youngest:.0f} - {oldest:.0f}")
         else:
             logger.error("No posts collected")
             
@@ -438,6 +1219,8 @@ if __name__ == "__main__":
             more_posts = scraper.scrape_with_pagination(target_posts=2000)
             if more_posts:
                 logger.info(f"Got {len(more_posts)} additional posts")
+
+        scraper.metrics.stop_export()
                 
     except Exception as e:
         logger.error(f"Script failed: {e}")
@@ -0,0 +1,220 @@
+"""
+Run metrics for the scraper: latency histograms, counters and gauges that
+can be written as Prometheus text or JSON while a scrape is running.
+
+A Prometheus file (any path not ending in .json) can be picked up by the
+node_exporter textfile collector; the JSON file is meant for ad-hoc analysis.
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds in seconds, from sub-millisecond regex calls to long rate-limit sleeps
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Bucketed distribution of observed values with count, sum and max"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (the max for the +Inf bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of histograms, counters and gauges keyed by name and labels.
+
+    Collectors are callables returning {name: value}; they are evaluated at
+    export time, so values other objects already track (limiter waits,
+    scraper totals, pipeline queue depth) are exported without extra
+    bookkeeping on the hot path.
+    """
+
+    def __init__(self, prefix='reddit_scraper', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._collectors = []
+        self._export_thread = None
+        self._export_stop = threading.Event()
+
+    def observe(self, name, value, **labels):
+        """Add one observation (usually seconds) to a histogram"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into a histogram, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def _collected_gauges(self):
+        gauges = dict(self._gauges)
+        for collector in self._collectors:
+            try:
+                for name, value in collector().items():
+                    gauges[(name, ())] = value
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return gauges
+
+    def histograms(self):
+        """{(name, labels): Histogram} copy, for reports such as print_stats"""
+        with self._lock:
+            return {key: _copy_histogram(histogram) for key, histogram in self._histograms.items()}
+
+    def snapshot(self):
+        """All metrics as plain data"""
+        gauges = self._collected_gauges()
+        with self._lock:
+            histograms = [
+                {'name': name, 'labels': dict(labels), 'count': h.count, 'sum': h.sum, 'max': h.max,
+                 'p50': h.quantile(0.5), 'p95': h.quantile(0.95), 'p99': h.quantile(0.99),
+                 'buckets': dict(zip([str(b) for b in h.buckets] + ['+Inf'], h.counts))}
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+        return {
+            'timestamp': time.time(),
+            'histograms': histograms,
+            'counters': counters,
+            'gauges': [{'name': name, 'labels': dict(labels), 'value': value}
+                       for (name, labels), value in sorted(gauges.items())]
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        gauges = self._collected_gauges()
+        lines = []
+        with self._lock:
+            declared = set()
+            for (name, labels), h in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} histogram")
+                    declared.add(metric)
+                cumulative = 0
+                for bound, count in zip(list(h.buckets) + ['+Inf'], h.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {h.sum}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {h.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} counter")
+                    declared.add(metric)
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            metric = f"{self.prefix}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} gauge")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write JSON (for a .json path) or Prometheus text, replacing the file atomically"""
+        content = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def start_export(self, path, interval=30.0):
+        """Rewrite `path` every `interval` seconds on a background thread until stop_export()"""
+        self.stop_export()
+        self._export_stop.clear()
+
+        def export_loop():
+            while not self._export_stop.wait(interval):
+                try:
+                    self.write(path)
+                except OSError as e:
+                    logger.warning(f"Could not write metrics to {path}: {e}")
+            self.write(path)
+
+        self._export_thread = threading.Thread(target=export_loop, name='metrics-export', daemon=True)
+        self._export_thread.start()
+        logger.info(f"Exporting metrics to {path} every {interval:.0f}s")
+
+    def stop_export(self):
+        """Stop the export thread after one final write"""
+        if self._export_thread is not None:
+            self._export_stop.set()
+            self._export_thread.join()
+            self._export_thread = None
+
+
+def _copy_histogram(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.count, copy.sum, copy.max = histogram.count, histogram.sum, histogram.max
+    return copy
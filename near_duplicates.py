@@ -0,0 +1,361 @@
+"""
+Near-duplicate (repost / cross-post copy) detection over post text with
+MinHash signatures and LSH banding.
+
+Each post's title and text are split into overlapping word shingles, and a
+MinHash signature of `num_perm` uint32 values is computed for a whole batch
+at once in NumPy. Signatures are cut into `bands`; posts sharing any band
+are candidates, and candidates whose signatures agree on at least
+`threshold` of their values (the estimated Jaccard similarity) are the same
+cluster. Candidate lookup is a sorted-array search per band, so a batch
+costs O(n log N) against an index of N posts instead of comparing pairs.
+
+The index lives in a directory and grows batch by batch: posts already in
+it keep their cluster without being shingled again, and new posts join an
+existing cluster when they match one. A cluster's ID is the post_id of its
+oldest post (the smallest base36 ID), so unique posts are their own cluster.
+
+Usage: python near_duplicates.py <index_dir> <posts.csv|parquet> [...]
+"""
+import json
+import os
+import re
+import sys
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from reddit_ids import decode_ids, encode_id
+
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+MAX_HASH = np.uint32(0xFFFFFFFF)
+# Odd 64-bit multipliers for combining token and band hashes
+MIXERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93],
+                  dtype=np.uint64)
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+# Shingles hashed per MinHash step; bounds the (perms x shingles) work array
+SHINGLES_PER_STEP = 1 << 19
+PERMS_PER_STEP = 16
+
+
+class _SortedRuns:
+    """
+    uint64 keys with int64 values in sorted runs, merged as they grow like
+    CompactIdSet in data cleaning.py. Each run is one .npz file in the index.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.runs = []  # [keys, values, file name or None until saved]
+        self._serial = 0
+
+    def add(self, keys, values):
+        if not len(keys):
+            return
+        order = np.argsort(keys, kind='stable')
+        self.runs.append([keys[order], values[order], None])
+        while len(self.runs) > 1 and len(self.runs[-2][0]) <= 2 * len(self.runs[-1][0]):
+            last_keys, last_values, _ = self.runs.pop()
+            keys = np.concatenate([self.runs[-1][0], last_keys])
+            values = np.concatenate([self.runs[-1][1], last_values])
+            order = np.argsort(keys, kind='stable')
+            self.runs[-1] = [keys[order], values[order], None]
+
+    def matches(self, queries):
+        """(query index, value) of every entry with each query key, in every run"""
+        found_queries, found_values = [], []
+        for keys, values, _ in self.runs:
+            starts = np.searchsorted(keys, queries, side='left')
+            counts = np.searchsorted(keys, queries, side='right') - starts
+            hit = np.flatnonzero(counts)
+            counts = counts[hit]
+            offsets = np.cumsum(counts) - counts
+            found_queries.append(np.repeat(hit, counts))
+            found_values.append(values[np.repeat(starts[hit] - offsets, counts) + np.arange(counts.sum())])
+        if not found_queries:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(found_queries), np.concatenate(found_values)
+
+    def save(self, index_dir):
+        """Write runs that have no file yet; returns the file names of all runs"""
+        for run in self.runs:
+            if run[2] is None:
+                self._serial += 1
+                run[2] = f"{self.name}_{self._serial:06d}.npz"
+                np.savez(os.path.join(index_dir, run[2]), keys=run[0], values=run[1])
+        return [run[2] for run in self.runs]
+
+    def remove_stale(self, index_dir):
+        """Delete files of runs that were merged away (or left by an interrupted flush)"""
+        kept = {run[2] for run in self.runs}
+        for file_name in os.listdir(index_dir):
+            if file_name.startswith(f"{self.name}_") and file_name.endswith('.npz') and file_name not in kept:
+                os.remove(os.path.join(index_dir, file_name))
+
+    def load(self, index_dir, file_names):
+        for file_name in file_names:
+            with np.load(os.path.join(index_dir, file_name)) as data:
+                self.runs.append([data['keys'], data['values'], file_name])
+            self._serial = max(self._serial, int(file_name[len(self.name) + 1:-4]))
+
+
+class NearDuplicateIndex:
+    """
+    On-disk MinHash/LSH index assigning a duplicate_cluster_id to each post.
+
+    With the defaults (128 permutations in 16 bands of 8) posts with Jaccard
+    similarity above ~0.7 are almost always candidates and those verified at
+    0.8 or more are clustered. Posts with fewer than `min_shingles` shingles
+    (short title-only posts) are too generic to compare and stay unique.
+    Changes are written to disk on flush() or close().
+    """
+
+    def __init__(self, index_dir, num_perm=128, bands=16, threshold=0.8, shingle_words=3,
+                 min_shingles=10, seed=1):
+        self.index_dir = index_dir
+        os.makedirs(index_dir, exist_ok=True)
+        meta_path = os.path.join(index_dir, 'meta.json')
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            num_perm, bands, threshold = meta['num_perm'], meta['bands'], meta['threshold']
+            shingle_words, min_shingles, seed = meta['shingle_words'], meta['min_shingles'], meta['seed']
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self.shingle_words = shingle_words
+        self.min_shingles = min_shingles
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        self.rows = meta.get('rows', 0)
+        self.near_duplicates = 0
+        self._band_runs = _SortedRuns('bands')
+        self._id_runs = _SortedRuns('ids')
+        self._band_runs.load(index_dir, meta.get('band_runs', []))
+        self._id_runs.load(index_dir, meta.get('id_runs', []))
+
+        # Drop rows appended after the last flush, e.g. by a run that crashed
+        self._signature_path = os.path.join(index_dir, 'signatures.u32')
+        self._cluster_path = os.path.join(index_dir, 'clusters.i64')
+        for path, row_bytes in ((self._signature_path, 4 * num_perm), (self._cluster_path, 8)):
+            with open(path, 'ab') as f:
+                f.truncate(self.rows * row_bytes)
+
+    def __len__(self):
+        return self.rows
+
+    def _stored(self, path, dtype, width):
+        if not self.rows:
+            return np.empty((0, width), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(self.rows, width))
+
+    def _shingles(self, texts):
+        """Hashed word shingles of every text, concatenated, plus the shingle count per text"""
+        token_hashes, lengths = [], []
+        for text in texts:
+            tokens = TOKEN_PATTERN.findall(text.lower()) if isinstance(text, str) else []
+            token_hashes.extend(zlib.crc32(token.encode()) for token in tokens)
+            lengths.append(len(tokens))
+        tokens = np.array(token_hashes, dtype=np.uint64)
+        lengths = np.array(lengths, dtype=np.int64)
+
+        k = self.shingle_words
+        counts = np.maximum(lengths - k + 1, 0)
+        starts = np.repeat(np.cumsum(lengths) - lengths, counts)
+        positions = starts + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        shingles = np.zeros(len(positions), dtype=np.uint64)
+        for offset in range(k):
+            shingles = (shingles ^ tokens[positions + offset]) * MIXERS[offset % len(MIXERS)]
+        shingles = (shingles >> np.uint64(32)) ^ (shingles & np.uint64(0xFFFFFFFF))
+        return shingles, counts
+
+    def signatures(self, texts):
+        """(MinHash signatures as (n, num_perm) uint32, mask of texts with enough shingles)"""
+        shingles, counts = self._shingles(texts)
+        valid = counts >= self.min_shingles
+        signatures = np.full((len(counts), self.num_perm), MAX_HASH, dtype=np.uint32)
+
+        ends = np.cumsum(counts)
+        docs = np.flatnonzero(valid)
+        first = 0
+        while first < len(docs):
+            # Take documents until SHINGLES_PER_STEP shingles are gathered
+            base = ends[docs[first]] - counts[docs[first]]
+            last = max(first + 1, np.searchsorted(ends[docs], base + SHINGLES_PER_STEP, side='right'))
+            step_docs = docs[first:last]
+            step_counts = counts[step_docs]
+            offsets = np.cumsum(step_counts) - step_counts
+            selected = np.repeat(ends[step_docs] - step_counts - offsets, step_counts) + np.arange(step_counts.sum())
+            values = shingles[selected]
+            for p in range(0, self.num_perm, PERMS_PER_STEP):
+                a = self._a[p:p + PERMS_PER_STEP, None]
+                b = self._b[p:p + PERMS_PER_STEP, None]
+                hashed = (a * values[None, :] + b) % MERSENNE_PRIME
+                signatures[step_docs, p:p + PERMS_PER_STEP] = np.minimum.reduceat(hashed, offsets, axis=1).T
+            first = last
+        return signatures, valid
+
+    def _band_keys(self, signatures):
+        """One uint64 key per (row, band), distinct between bands"""
+        rows_per_band = self.num_perm // self.bands
+        banded = signatures.reshape(len(signatures), self.bands, rows_per_band).astype(np.uint64)
+        keys = np.broadcast_to(np.arange(self.bands, dtype=np.uint64) * MIXERS[0],
+                               (len(signatures), self.bands)).copy()
+        for column in range(rows_per_band):
+            keys = (keys ^ banded[:, :, column]) * MIXERS[1 + column % (len(MIXERS) - 1)]
+        return keys
+
+    def _agreement(self, left, right):
+        return (left == right).mean(axis=1)
+
+    def assign(self, post_ids, texts):
+        """Cluster IDs for a batch of posts, adding the new ones to the index"""
+        post_ids = pd.Series(post_ids, dtype=object).reset_index(drop=True)
+        texts = pd.Series(texts, dtype=object).reset_index(drop=True)
+        keys = decode_ids(post_ids)
+        clusters = keys.copy()
+
+        # Posts indexed before keep their cluster; repeats in the batch follow the first copy
+        indexable = keys >= 0
+        _, first_copy, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        first = np.zeros(len(keys), dtype=bool)
+        first[first_copy] = True
+        query, rows = self._id_runs.matches(keys.view(np.uint64))
+        known = np.zeros(len(keys), dtype=bool)
+        known[query] = True
+        clusters[query] = self._stored(self._cluster_path, np.int64, 1)[rows, 0]
+        new = np.flatnonzero(indexable & first & ~known)
+
+        signatures, valid = self.signatures(texts.iloc[new])
+        new_clusters = self._cluster(keys[new], signatures, valid)
+        clusters[new] = new_clusters
+        self.near_duplicates += int((new_clusters != keys[new]).sum())
+        clusters = clusters[first_copy][inverse.reshape(-1)]
+
+        # Append the new posts; only those with enough shingles go into the bands
+        new_rows = self.rows + np.arange(len(new), dtype=np.int64)
+        with open(self._signature_path, 'ab') as f:
+            f.write(signatures.tobytes())
+        with open(self._cluster_path, 'ab') as f:
+            f.write(new_clusters.astype(np.int64).tobytes())
+        band_keys = self._band_keys(signatures[valid])
+        self._band_runs.add(band_keys.ravel(), np.repeat(new_rows[valid], self.bands))
+        self._id_runs.add(keys[new].view(np.uint64), new_rows)
+        self.rows += len(new)
+
+        return np.array([encode_id(cluster) if key >= 0 else post_id
+                         for cluster, key, post_id in zip(clusters, keys, post_ids)], dtype=object)
+
+    def _cluster(self, keys, signatures, valid):
+        """Cluster key (smallest post key) of each new post, joining indexed clusters where they match"""
+        n = len(keys)
+        labels = np.arange(n)
+        existing = np.full(n, np.iinfo(np.int64).max)
+        docs = np.flatnonzero(valid)
+        if not len(docs):
+            return keys.copy()
+        band_keys = self._band_keys(signatures[docs])
+
+        # Candidates already in the index
+        query, rows = self._band_runs.matches(band_keys.ravel())
+        if len(query):
+            pairs = np.unique(np.stack([docs[query // self.bands], rows], axis=1), axis=0)
+            stored = self._stored(self._signature_path, np.uint32, self.num_perm)
+            similar = self._agreement(signatures[pairs[:, 0]], stored[pairs[:, 1]]) >= self.threshold
+            if similar.any():
+                matched = pairs[similar]
+                cluster_keys = self._stored(self._cluster_path, np.int64, 1)[matched[:, 1], 0]
+                np.minimum.at(existing, matched[:, 0], cluster_keys)
+
+        # Candidates within the batch: link each post to the first one sharing its band
+        left, right = [], []
+        for band in range(self.bands):
+            column = band_keys[:, band]
+            order = np.argsort(column, kind='stable')
+            ordered = column[order]
+            group_start = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+            leaders = order[np.repeat(group_start, np.diff(np.r_[group_start, len(order)]))]
+            linked = leaders != order
+            left.append(docs[leaders[linked]])
+            right.append(docs[order[linked]])
+        left, right = np.concatenate(left), np.concatenate(right)
+        if len(left):
+            pairs = np.unique(np.stack([left, right], axis=1), axis=0)
+            similar = self._agreement(signatures[pairs[:, 0]], signatures[pairs[:, 1]]) >= self.threshold
+            left, right = pairs[similar, 0], pairs[similar, 1]
+
+        # Connected components by label propagation with pointer jumping
+        while len(left):
+            lowest = np.minimum(labels[left], labels[right])
+            before = labels.copy()
+            np.minimum.at(labels, left, lowest)
+            np.minimum.at(labels, right, lowest)
+            labels = labels[labels]
+            if np.array_equal(labels, before):
+                break
+
+        component_existing = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(component_existing, labels, existing)
+        component_oldest = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(component_oldest, labels, keys)
+        joined = component_existing[labels]
+        return np.where(joined != np.iinfo(np.int64).max, joined, component_oldest[labels])
+
+    def flush(self):
+        """
+        Write new runs, then switch meta.json to them atomically, and only then
+        delete the runs it no longer lists, so a crash at any point leaves an
+        index that loads.
+        """
+        meta = {
+            'num_perm': self.num_perm,
+            'bands': self.bands,
+            'threshold': self.threshold,
+            'shingle_words': self.shingle_words,
+            'min_shingles': self.min_shingles,
+            'seed': self.seed,
+            'rows': self.rows,
+            'band_runs': self._band_runs.save(self.index_dir),
+            'id_runs': self._id_runs.save(self.index_dir)
+        }
+        temp_path = os.path.join(self.index_dir, 'meta.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(temp_path, os.path.join(self.index_dir, 'meta.json'))
+        self._band_runs.remove_stale(self.index_dir)
+        self._id_runs.remove_stale(self.index_dir)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def post_texts(chunk):
+    """Title and body of each post, as compared for near-duplicates"""
+    return chunk['title'].fillna('').astype(str) + ' ' + chunk['text'].fillna('').astype(str)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    from parquet_io import iter_parquet_chunks
+    with NearDuplicateIndex(sys.argv[1]) as index:
+        for path in sys.argv[2:]:
+            chunks = (iter_parquet_chunks(path) if path.endswith('.parquet') or os.path.isdir(path)
+                      else pd.read_csv(path, usecols=['post_id', 'title', 'text'], dtype=str, chunksize=100_000))
+            for chunk in chunks:
+                index.assign(chunk['post_id'], post_texts(chunk))
+        print(f"{len(index):,} posts indexed, {index.near_duplicates:,} new near-duplicates")
@@ -0,0 +1,81 @@
+"""Parquet/Arrow helpers shared by the scraper and the cleaning step (needs pyarrow)"""
+import os
+import uuid
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Low-cardinality text columns stored dictionary-encoded (read back as categories)
+DICTIONARY_COLUMNS = [
+    'author', 'comment_author', 'flair', 'gender', 'comment_gender', 'subreddit'
+]
+HIVE_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def to_arrow(frame):
+    """
+    Convert a DataFrame to an Arrow table with dictionary-encoded text columns.
+    The dictionaries are built from the values in `frame` only; converting
+    pandas categories directly would copy every category into every file.
+    """
+    frame = frame.astype({column: 'string' for column in DICTIONARY_COLUMNS
+                          if column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype)})
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for i, name in enumerate(table.schema.names):
+        if name in DICTIONARY_COLUMNS:
+            table = table.set_column(i, name, pc.dictionary_encode(table.column(name)))
+    return table
+
+
+def write_partitioned(frame, root_path, partition_cols):
+    """
+    Write a DataFrame as a hive-partitioned Parquet dataset (col=value/
+    directories), one new file per partition so repeated writes append.
+    """
+    groups = frame.groupby(partition_cols, observed=True, dropna=False, sort=False)
+    for key, group in groups:
+        key = key if isinstance(key, tuple) else (key,)
+        directory = os.path.join(root_path, *(
+            f"{column}={HIVE_NULL_PARTITION if pd.isna(value) else quote(str(value), safe='')}"
+            for column, value in zip(partition_cols, key)))
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(to_arrow(group.drop(columns=partition_cols)),
+                       os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"))
+
+
+def iter_parquet_chunks(path, columns=None, batch_size=100_000):
+    """
+    Yield DataFrames from a Parquet file or partitioned dataset directory.
+    Unless `columns` asks for them, partition keys (directory-only columns
+    such as created_day) are left out, so records read back as written.
+    """
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    if columns is None:
+        partition_keys = set(dataset.partitioning.schema.names) if dataset.partitioning is not None else set()
+        columns = [name for name in dataset.schema.names if name not in partition_keys]
+    for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+class ParquetChunkWriter:
+    """Append DataFrame chunks to one Parquet file, one row group per chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+
+    def write(self, frame):
+        table = to_arrow(frame)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
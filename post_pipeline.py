@@ -0,0 +1,217 @@
+"""
+Two-stage post processing: the threads iterating PRAW listings only copy raw
+attributes into tuples, and a worker pool turns them into records (date
+conversion, truncation, age/gender extraction) so CPU work never delays the
+next network request.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from age_gender import extract_age_gender
+
+
+def raw_post(post, subreddit_name):
+    """Copy the attributes a post record needs into a plain tuple, without parsing anything"""
+    return (
+        post.id,
+        post.title,
+        post.selftext,
+        str(post.author) if post.author else None,
+        post.score,
+        post.upvote_ratio,
+        post.num_comments,
+        post.created_utc,
+        post.url,
+        post.permalink,
+        post.link_flair_text,
+        subreddit_name
+    )
+
+
+def build_post_record(raw, extraction_times=None):
+    """Build the output record for a raw post tuple, optionally timing the extraction"""
+    (post_id, title, selftext, author, score, upvote_ratio, num_comments,
+     created_utc, url, permalink, flair, subreddit_name) = raw
+    post_date = datetime.fromtimestamp(created_utc, tz=timezone.utc)
+
+    # Get all text content
+    title_text = title or ""
+    body_text = selftext or ""
+    combined_text = f"{title_text} {body_text}"
+
+    # Extract age/gender
+    start = time.perf_counter()
+    gender, age = extract_age_gender(combined_text)
+    if extraction_times is not None:
+        extraction_times.append(time.perf_counter() - start)
+
+    return {
+        'post_id': post_id,
+        'title': title_text[:500],  # Limit title length
+        'text': body_text[:1000],  # Limit text length
+        'author': author or '[deleted]',
+        'score': score,
+        'upvote_ratio': upvote_ratio,
+        'num_comments': num_comments,
+        'created_date': post_date.strftime('%Y-%m-%d %H:%M:%S'),
+        'url': url,
+        'permalink': f"https://reddit.com{permalink}",
+        'flair': flair,
+        'gender': gender,
+        'age': age,
+        'age_gender_inferred': False,
+        'has_selftext': bool(body_text),
+        'text_length': len(combined_text),
+        'subreddit': subreddit_name
+    }
+
+
+def build_post_records(raws):
+    """
+    Worker task: records for a batch (None where building failed), the seconds
+    spent, and the extraction time of each post
+    """
+    start = time.perf_counter()
+    records = []
+    extraction_times = []
+    for raw in raws:
+        try:
+            records.append(build_post_record(raw, extraction_times))
+        except Exception:
+            records.append(None)
+    return records, time.perf_counter() - start, extraction_times
+
+
+class PostPipeline:
+    """
+    Shared worker pool for the record-building stage.
+
+    Each scrape loop opens its own PostStream, so streams used by concurrent
+    scrapes (e.g. MultiSubredditScheduler) never mix their records; all of
+    them share the pool and the statistics. With processes=True the pool is
+    a ProcessPoolExecutor and posts are shipped in batches of batch_size.
+    Worker timings go to `metrics` (a metrics.MetricsRegistry) if set.
+    """
+
+    def __init__(self, workers=4, batch_size=50, max_pending=8, processes=True, metrics=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.processes = processes
+        self.metrics = metrics
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.built = 0
+        self.failed = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.fetch_seconds = 0.0
+        self.build_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    def _submit(self, raws):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+                    self._executor = executor_class(max_workers=self.workers)
+        return self._executor.submit(build_post_records, raws)
+
+    def _record(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def stream(self):
+        return PostStream(self)
+
+    def stats(self):
+        """Queue depths and per-stage throughput (posts per second)"""
+        with self._lock:
+            return {
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'submitted': self.submitted,
+                'built': self.built,
+                'failed': self.failed,
+                'fetch_rate': self.submitted / self.fetch_seconds if self.fetch_seconds else 0.0,
+                'build_rate': self.built / self.build_seconds if self.build_seconds else 0.0,
+                'blocked_seconds': self.blocked_seconds
+            }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PostStream:
+    """
+    One scrape loop's bounded, order-preserving queue into a PostPipeline.
+
+    put() never blocks on the workers unless max_pending batches are already
+    in flight; it returns the records whose batches have finished, in the
+    order their posts were put. drain() waits for the rest.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self._batch = []
+        self._pending = deque()  # (future, number of posts), oldest first
+        self.in_flight = 0
+        self._fetch_start = time.perf_counter()
+
+    def _collect(self, future, count):
+        start = time.perf_counter()
+        records, seconds, extraction_times = future.result()
+        failed = records.count(None)
+        metrics = self.pipeline.metrics
+        if metrics is not None:
+            metrics.observe('post_build_batch_seconds', seconds)
+            for extraction_seconds in extraction_times:
+                metrics.observe('extraction_seconds', extraction_seconds, kind='post')
+        self.in_flight -= count
+        self.pipeline._record(built=count - failed, failed=failed, build_seconds=seconds,
+                              queue_depth=-count, blocked_seconds=time.perf_counter() - start)
+        return records
+
+    def _flush_batch(self):
+        if self._batch:
+            self._pending.append((self.pipeline._submit(self._batch), len(self._batch)))
+            self._batch = []
+
+    def put(self, raw):
+        """Queue a raw post tuple; returns the records that are ready (None for failures)"""
+        self.pipeline._record(submitted=1, queue_depth=1,
+                              fetch_seconds=time.perf_counter() - self._fetch_start)
+        self.in_flight += 1
+        self._batch.append(raw)
+        if len(self._batch) >= self.pipeline.batch_size:
+            self._flush_batch()
+
+        ready = []
+        while self._pending and (self._pending[0][0].done() or len(self._pending) > self.pipeline.max_pending):
+            ready.extend(self._collect(*self._pending.popleft()))
+        self._fetch_start = time.perf_counter()
+        return ready
+
+    def drain(self):
+        """Wait for every queued post and return the remaining records in order"""
+        self._flush_batch()
+        ready = []
+        while self._pending:
+            ready.extend(self._collect(*self._pending.popleft()))
+        self._fetch_start = time.perf_counter()
+        return ready
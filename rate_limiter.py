@@ -0,0 +1,170 @@
+"""Rate limiting shared by the scraper's Reddit API call sites"""
+import random
+import threading
+import time
+
+# Reddit allows 100 OAuth queries per minute, averaged over a 10 minute window
+REDDIT_QUERIES_PER_MINUTE = 100
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Tokens refill continuously at `rate` per second
+    up to `capacity`; acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate=REDDIT_QUERIES_PER_MINUTE / 60, capacity=10,
+                 clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Take `tokens` from the bucket, sleeping as needed. Returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.total_wait += waited
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+
+            self._sleep(delay)
+            waited += delay
+
+    def call(self, func, *args, **kwargs):
+        """Run func once; the bucket only paces calls and does not retry them"""
+        return func(*args, **kwargs)
+
+
+class AdaptiveRateLimiter:
+    """
+    Paces API calls to the quota Reddit actually reports instead of fixed sleeps.
+
+    `limits` is a callable returning PRAW's `reddit.auth.limits` dict
+    (remaining, used and, on older PRAW versions, reset_timestamp). The
+    remaining budget is spread evenly over the time left in the window, with
+    up to `burst` calls allowed back to back when the budget is unused. Until
+    the first response arrives there is no quota information, so calls fall
+    back to a TokenBucket. Failed calls are retried with jittered exponential
+    backoff when they raise one of `retry_on`.
+    """
+
+    def __init__(self, limits=None, window=600, reserve=5, burst=10, fallback=None,
+                 retry_on=(), max_retries=4, base_backoff=2.0, max_backoff=60.0,
+                 clock=time.monotonic, wall_clock=time.time, sleep=time.sleep,
+                 rng=None):
+        self.limits = limits
+        self.window = window
+        self.reserve = reserve
+        self.burst = burst
+        self.fallback = fallback or TokenBucket(clock=clock, sleep=sleep)
+        self.retry_on = tuple(retry_on)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._next_slot = clock()
+        self._window_start = None
+        self._last_used = None
+
+        self.calls = 0
+        self.retries = 0
+        self.total_wait = 0.0
+        self.backoff_wait = 0.0
+
+    def _read_limits(self):
+        if self.limits is None:
+            return None, None
+        try:
+            limits = self.limits() or {}
+        except Exception:
+            return None, None
+
+        remaining = limits.get('remaining')
+        used = limits.get('used')
+        if remaining is None:
+            return None, None
+
+        now = self._wall_clock()
+        reset = limits.get('reset_timestamp')
+        if reset is None:
+            # Newer PRAW does not expose the reset time, so track the window
+            # ourselves: it restarts whenever the used count drops
+            if self._window_start is None or (used is not None and self._last_used is not None
+                                              and used < self._last_used):
+                self._window_start = now
+            self._last_used = used
+            reset = self._window_start + self.window
+
+        return float(remaining), max(reset - now, 0.0)
+
+    def acquire(self):
+        """Wait until the next call fits in the quota. Returns seconds waited"""
+        with self._lock:
+            self.calls += 1
+            remaining, seconds_to_reset = self._read_limits()
+
+            if remaining is not None:
+                usable = remaining - self.reserve
+                interval = seconds_to_reset if usable <= 0 else seconds_to_reset / usable
+                now = self._clock()
+                self._next_slot = max(self._next_slot, now - self.burst * interval)
+                start = max(now, self._next_slot)
+                self._next_slot = start + interval
+                delay = start - now
+
+        if remaining is None:
+            delay = self.fallback.acquire()
+        elif delay > 0:
+            self._sleep(delay)
+
+        with self._lock:
+            self.total_wait += delay
+        return delay
+
+    def backoff(self, attempt):
+        """Sleep for a jittered exponential backoff after a failed call"""
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        delay *= 0.5 + self._rng.random() / 2
+        self._sleep(delay)
+        with self._lock:
+            self.retries += 1
+            self.total_wait += delay
+            self.backoff_wait += delay
+        return delay
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run func, retrying with backoff on the configured retryable errors.
+        The caller acquires a slot for the first attempt; every retry is
+        another request, so it waits for a slot of its own after the backoff.
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except self.retry_on:
+                if attempt >= self.max_retries:
+                    raise
+                self.backoff(attempt)
+                self.acquire()
+                attempt += 1
@@ -0,0 +1,132 @@
+"""
+Column buffers for harvested records: one typed array per field instead of
+one dict per record, convertible to a DataFrame or Arrow table in one step
+"""
+from array import array
+
+import numpy as np
+import pandas as pd
+
+# String columns with few distinct values; equal values share one object
+INTERNED_COLUMNS = frozenset({
+    'author', 'flair', 'gender', 'subreddit', 'comment_author', 'comment_gender'
+})
+
+
+class RecordColumns:
+    """
+    Append-only struct-of-arrays store for records with a fixed schema, e.g.
+    POST_COLUMNS ({name: pandas dtype}). Int64 and float64 fields go into
+    array('q') / array('d') with a null mask, booleans into a bytearray, and
+    strings into lists, with INTERNED_COLUMNS values deduplicated. Fields
+    outside the schema are ignored.
+
+    Behaves like a read-only list of dicts (len, indexing, iteration build
+    rows on demand) so callers that used lists keep working; to_frame() and
+    to_arrow() convert whole columns without building rows.
+    """
+
+    def __init__(self, columns):
+        self.columns = dict(columns)
+        self._values = {}
+        self._masks = {}
+        for name, dtype in self.columns.items():
+            if dtype == 'Int64':
+                self._values[name] = array('q')
+            elif dtype == 'float64':
+                self._values[name] = array('d')
+            elif dtype == 'boolean':
+                self._values[name] = bytearray()
+            else:
+                self._values[name] = []
+                continue
+            self._masks[name] = bytearray()
+        self._strings = {}
+        self._length = 0
+
+    def append(self, record):
+        for name, values in self._values.items():
+            value = record.get(name)
+            mask = self._masks.get(name)
+            if mask is None:
+                if value is not None and name in INTERNED_COLUMNS:
+                    value = self._strings.setdefault(value, value)
+                values.append(value)
+            elif value is None or value is pd.NA:
+                values.append(0)
+                mask.append(1)
+            else:
+                values.append(value)
+                mask.append(0)
+        self._length += 1
+
+    def extend(self, records):
+        if isinstance(records, RecordColumns) and records.columns == self.columns:
+            for name, values in self._values.items():
+                other = records._values[name]
+                values.extend([self._strings.setdefault(v, v) if v is not None else None for v in other]
+                              if name in INTERNED_COLUMNS else other)
+                if name in self._masks:
+                    self._masks[name].extend(records._masks[name])
+            self._length += len(records)
+            return
+        for record in records:
+            self.append(record)
+
+    def __len__(self):
+        return self._length
+
+    def _row(self, i):
+        row = {}
+        for name, values in self._values.items():
+            mask = self._masks.get(name)
+            if mask is not None and mask[i]:
+                row[name] = None
+            elif self.columns[name] == 'boolean':
+                row[name] = bool(values[i])
+            else:
+                row[name] = values[i]
+        return row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('record index out of range')
+        return self._row(index)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self._row(i)
+
+    def column(self, name):
+        """One column as a pandas extension array of its schema dtype"""
+        values = self._values[name]
+        dtype = self.columns[name]
+        if dtype == 'string':
+            return pd.array(values, dtype='string')
+        mask = np.frombuffer(self._masks[name], dtype=np.bool_).copy()
+        if dtype == 'Int64':
+            return pd.arrays.IntegerArray(np.frombuffer(values, dtype=np.int64).copy(), mask)
+        if dtype == 'float64':
+            # Plain float64 with NaN for missing, as DataFrame.astype('float64') gives
+            return np.where(mask, np.nan, np.frombuffer(values, dtype=np.float64))
+        return pd.arrays.BooleanArray(np.frombuffer(values, dtype=np.bool_).copy(), mask)
+
+    def to_frame(self):
+        return pd.DataFrame({name: self.column(name) for name in self.columns})
+
+    def to_arrow(self):
+        import pyarrow as pa
+        arrays = {}
+        for name, dtype in self.columns.items():
+            values = self._values[name]
+            if dtype == 'string':
+                arrays[name] = pa.array(values, type=pa.string())
+                continue
+            numpy_dtype = {'Int64': np.int64, 'float64': np.float64, 'boolean': np.bool_}[dtype]
+            arrays[name] = pa.array(np.frombuffer(values, dtype=numpy_dtype).copy(),
+                                    mask=np.frombuffer(self._masks[name], dtype=np.bool_).copy())
+        return pa.table(arrays)
@@ -0,0 +1,36 @@
+"""Column order and dtypes of scraped records, importable without the scraper"""
+
+# Records built by post_pipeline.build_post_record / ImprovedRedditScraper._comment_record
+POST_COLUMNS = {
+    'post_id': 'string',
+    'title': 'string',
+    'text': 'string',
+    'author': 'string',
+    'score': 'Int64',
+    'upvote_ratio': 'float64',
+    'num_comments': 'Int64',
+    'created_date': 'string',
+    'url': 'string',
+    'permalink': 'string',
+    'flair': 'string',
+    'gender': 'string',
+    'age': 'Int64',
+    # True when gender/age came from the author's other posts, not this text
+    'age_gender_inferred': 'boolean',
+    'has_selftext': 'boolean',
+    'text_length': 'Int64',
+    'subreddit': 'string'
+}
+COMMENT_COLUMNS = {
+    'comment_id': 'string',
+    'post_id': 'string',
+    'comment_parent_id': 'string',
+    'comment_body': 'string',
+    'comment_author': 'string',
+    'comment_score': 'Int64',
+    'comment_created_date': 'string',
+    'comment_gender': 'string',
+    'comment_age': 'Int64',
+    'comment_age_gender_inferred': 'boolean',
+    'subreddit': 'string'
+}
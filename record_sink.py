@@ -0,0 +1,117 @@
+"""Streaming, incremental writers for scraped records"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+SINK_FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'jsonl': '.jsonl'}
+
+
+class StreamingSink:
+    """
+    Buffers records and appends them to disk in chunks as they arrive, so
+    memory stays flat and a crash only loses the unflushed buffer.
+
+    `columns` maps column name to pandas dtype and fixes the column order and
+    types of every chunk (needed for CSV headers and the Parquet schema).
+    A chunk is flushed once `flush_every` records are buffered or
+    `flush_interval` seconds have passed since the last flush.
+    Parquet output writes one row group per chunk and needs pyarrow.
+    With `metrics` (a metrics.MetricsRegistry) each chunk write is timed.
+    """
+
+    def __init__(self, path, columns, format=None, flush_every=500, flush_interval=30.0,
+                 metrics=None):
+        if format is None:
+            format = os.path.splitext(path)[1].lstrip('.') or 'csv'
+        if format not in SINK_FORMATS:
+            raise ValueError(f"Unsupported sink format '{format}', expected one of {sorted(SINK_FORMATS)}")
+
+        self.path = path
+        self.columns = dict(columns)
+        self.format = format
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.records_written = 0
+        self.chunks_written = 0
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._parquet_writer = None
+        self._closed = False
+
+    def write(self, record):
+        """Buffer one record dict, flushing if the chunk is full or overdue"""
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"Sink {self.path} is closed")
+            self._buffer.append(record)
+            if (len(self._buffer) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Write any buffered records to disk"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush remaining records and release the file"""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            if self._parquet_writer is not None:
+                self._parquet_writer.close()
+                self._parquet_writer = None
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _chunk_frame(self, records):
+        frame = pd.DataFrame.from_records(records, columns=list(self.columns))
+        return frame.astype(self.columns)
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        records, self._buffer = self._buffer, []
+        start = time.perf_counter()
+
+        if self.format == 'jsonl':
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps({column: record.get(column) for column in self.columns}, default=str))
+                    f.write('\n')
+        elif self.format == 'csv':
+            write_header = self.records_written == 0 and not os.path.exists(self.path)
+            self._chunk_frame(records).to_csv(self.path, mode='a', header=write_header, index=False)
+        else:
+            self._write_parquet_row_group(self._chunk_frame(records))
+
+        self.records_written += len(records)
+        self.chunks_written += 1
+        if self.metrics is not None:
+            self.metrics.observe('sink_write_seconds', time.perf_counter() - start, format=self.format)
+
+    def _write_parquet_row_group(self, frame):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
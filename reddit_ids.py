@@ -0,0 +1,45 @@
+"""
+Base36 Reddit IDs (without t1_/t3_ prefixes) as int64 keys, shared by the
+seen-sets, the thread index and the near-duplicate index.
+
+Only lowercase base36 strings of up to 12 characters are decoded; those fit
+in an int64. Anything else (missing, prefixed, too long, or accepted by
+int(x, 36) only loosely, like '_' or surrounding whitespace) gets a default
+key instead of raising, so one bad ID never aborts a build.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# Decodes exactly into a non-negative int64 (36**12 < 2**63)
+BASE36_ID = r'[0-9a-z]{1,12}'
+INVALID_KEY = -1
+
+_BASE36_PATTERN = re.compile(BASE36_ID)
+
+
+def decode_id(value, default=INVALID_KEY):
+    """Key of one ID, or `default` if it is not a valid base36 ID"""
+    if isinstance(value, str) and _BASE36_PATTERN.fullmatch(value):
+        return int(value, 36)
+    return default
+
+
+def base36_mask(ids):
+    """Boolean array marking the valid base36 IDs"""
+    return pd.Series(ids, dtype=object).str.fullmatch(BASE36_ID).fillna(False).to_numpy(dtype=bool)
+
+
+def decode_ids(ids, default=INVALID_KEY):
+    """Keys of many IDs as an int64 array; invalid IDs become `default`"""
+    values = pd.Series(ids, dtype=object).to_numpy()
+    valid = base36_mask(values)
+    keys = np.full(len(values), default, dtype=np.int64)
+    keys[valid] = np.fromiter((int(value, 36) for value in values[valid]), dtype=np.int64,
+                              count=int(valid.sum()))
+    return keys
+
+
+def encode_id(key):
+    return np.base_repr(int(key), 36).lower()
@@ -0,0 +1,65 @@
+"""Scrape several subreddits concurrently under one shared rate budget"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class MultiSubredditScheduler:
+    """
+    Runs scrape_multiple_sources for many subreddits on a thread pool.
+
+    All jobs share one scraper, so they draw from its single rate limiter and
+    counters; wall-clock time is bounded by the API budget rather than by the
+    number of communities. Each entry of `subreddits` is either a name or a
+    dict with 'name' and optional 'target_posts' and 'source_weights'.
+    """
+
+    def __init__(self, scraper, subreddits, target_posts=1000, max_workers=8):
+        self.scraper = scraper
+        self.jobs = [self._job(entry, target_posts) for entry in subreddits]
+        self.max_workers = max_workers
+        self.results = {}
+        self.durations = {}
+
+    @staticmethod
+    def _job(entry, default_target):
+        if isinstance(entry, str):
+            entry = {'name': entry}
+        return {
+            'name': entry['name'],
+            'target_posts': entry.get('target_posts', default_target),
+            'source_weights': entry.get('source_weights')
+        }
+
+    def _run_job(self, job):
+        start = time.time()
+        try:
+            posts = self.scraper.scrape_multiple_sources(
+                target_posts=job['target_posts'],
+                subreddit_name=job['name'],
+                source_weights=job['source_weights']
+            )
+        except Exception as e:
+            logger.error(f"Scraping r/{job['name']} failed: {e}")
+            posts = []
+        self.durations[job['name']] = time.time() - start
+        logger.info(f"r/{job['name']}: {len(posts)} posts in {self.durations[job['name']]:.1f}s")
+        return posts
+
+    def run(self):
+        """Scrape every subreddit; returns all posts in subreddit order"""
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='subreddit') as executor:
+            for job, posts in zip(self.jobs, executor.map(self._run_job, self.jobs)):
+                self.results[job['name']] = posts
+
+        # scrape_multiple_sources resets start_time per call; report the whole run
+        self.scraper.start_time = start
+        all_posts = self.scraper.post_records()
+        for job in self.jobs:
+            all_posts.extend(self.results[job['name']])
+        logger.info(f"Scraped {len(all_posts)} posts from {len(self.jobs)} subreddits "
+                    f"in {time.time() - start:.1f}s")
+        return all_posts
@@ -0,0 +1,213 @@
+"""
+Listing planner that orders and trims overlapping sources (hot, new, tops,
+rising, ...) so pages expected to return only duplicates are never fetched,
+plus a compact exact seen-set for base36 Reddit IDs.
+"""
+import bisect
+import math
+import threading
+from array import array
+
+import numpy as np
+
+from reddit_ids import decode_id, decode_ids
+
+PAGE_SIZE = 100
+# Sparse blocks keep sorted 16-bit offsets; denser ones switch to an 8 KiB bitmap
+ARRAY_CONTAINER_MAX = 4096
+
+
+class IdBitmap:
+    """
+    Exact set of base36 IDs stored roaring-bitmap style: the decoded integer
+    is split into a high key and a 16-bit offset, and each high key holds a
+    sorted uint16 array (2 bytes per ID) or, past 4096 members, a bitmap.
+    A subreddit's posts are sparse in Reddit's global ID sequence, so most
+    blocks stay arrays. IDs that are not base36 go to a plain set.
+    """
+
+    def __init__(self, ids=()):
+        self._containers = {}
+        self._other = set()
+        self._size = 0
+        for item_id in ids:
+            self.add(item_id)
+
+    @staticmethod
+    def _split(item_id):
+        value = decode_id(item_id, None)
+        if value is None:
+            return None, None
+        return value >> 16, value & 0xFFFF
+
+    def __contains__(self, item_id):
+        high, low = self._split(item_id)
+        if high is None:
+            return item_id in self._other
+        container = self._containers.get(high)
+        if container is None:
+            return False
+        if isinstance(container, array):
+            i = bisect.bisect_left(container, low)
+            return i < len(container) and container[i] == low
+        return bool(container[low >> 3] & (1 << (low & 7)))
+
+    def add(self, item_id):
+        """Add an ID; returns True if it was not already present"""
+        high, low = self._split(item_id)
+        if high is None:
+            if item_id in self._other:
+                return False
+            self._other.add(item_id)
+            self._size += 1
+            return True
+
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array('H', [low])
+        elif isinstance(container, array):
+            i = bisect.bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return False
+            if len(container) < ARRAY_CONTAINER_MAX:
+                container.insert(i, low)
+            else:
+                bitmap = bytearray(8192)
+                for value in container:
+                    bitmap[value >> 3] |= 1 << (value & 7)
+                bitmap[low >> 3] |= 1 << (low & 7)
+                self._containers[high] = bitmap
+        else:
+            if container[low >> 3] & (1 << (low & 7)):
+                return False
+            container[low >> 3] |= 1 << (low & 7)
+        self._size += 1
+        return True
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        """Approximate payload size, excluding the non-base36 fallback set"""
+        return sum(len(c) * c.itemsize if isinstance(c, array) else len(c) for c in self._containers.values())
+
+
+class SourcePlanner:
+    """
+    Plans which listings to read, in what order and how deep.
+
+    Every listing read is recorded: the IDs in listing order and, per page of
+    100, how many were new. The last run's IDs of each listing (kept in the
+    crawl state when there is one) show how much the listings overlap. plan()
+    picks sources greedily by estimated new posts per API call given what the
+    sources before them cover, and trims each after its last page expected to
+    yield at least `min_new_per_call` new posts. At least one page of every
+    source is always read so the estimates stay current, and a source whose
+    recorded pages were all productive may read one page further.
+    """
+
+    def __init__(self, crawl_state=None, min_new_per_call=5, page_size=PAGE_SIZE):
+        self.crawl_state = crawl_state
+        self.min_new_per_call = min_new_per_call
+        self.page_size = page_size
+        self.history = {}
+        self.pages = {}
+        self._current = {}
+        self._lock = threading.Lock()
+        if crawl_state is not None:
+            for source, blob in crawl_state.load_listing_history().items():
+                self.history[source] = np.frombuffer(blob, dtype=np.int64)
+
+    def _page_yields(self, ids, limit, covered):
+        """Estimated new IDs on each page of a recorded listing, given IDs already covered"""
+        if limit is not None:
+            ids = ids[:limit]
+        seen = set(covered)
+        yields = []
+        for start in range(0, len(ids), self.page_size):
+            page = ids[start:start + self.page_size].tolist()
+            yields.append(len(set(page) - seen))
+            seen.update(page)
+        return yields
+
+    def plan(self, keys, limits):
+        """
+        Plan sources given their keys and item limits (None = unlimited).
+        Returns [(index, limit, estimated new per call)]; sources without a
+        recorded run come first, unchanged, with no estimate.
+        """
+        with self._lock:
+            history = dict(self.history)
+
+        planned = [(i, limits[i], None) for i, key in enumerate(keys) if key not in history]
+        remaining = [i for i, key in enumerate(keys) if key in history]
+        covered = set()
+
+        while remaining:
+            best = None
+            for i in remaining:
+                yields = self._page_yields(history[keys[i]], limits[i], covered)
+                productive = [p for p, new in enumerate(yields) if new >= self.min_new_per_call]
+                kept = productive[-1] + 1 if productive else 1
+                rate = sum(yields[:kept]) / kept if yields else float('inf')
+                if best is None or rate > best[0]:
+                    best = (rate, i, kept, len(yields))
+
+            rate, i, kept, recorded_pages = best
+            remaining.remove(i)
+            covered.update(history[keys[i]][:kept * self.page_size].tolist())
+
+            limit = limits[i]
+            if kept >= recorded_pages:
+                # Productive to the end of what was read last time: allow one more page
+                new_limit = None if limit is None else min(limit, (kept + 1) * self.page_size)
+            else:
+                new_limit = kept * self.page_size if limit is None else min(limit, kept * self.page_size)
+            planned.append((i, new_limit, None if math.isinf(rate) else rate))
+
+        return planned
+
+    def start(self, key):
+        with self._lock:
+            self._current[key] = []
+            self.pages[key] = []
+
+    def observe(self, key, item_id, new):
+        """Record one listing item and whether it was new"""
+        ids = self._current[key]
+        pages = self.pages[key]
+        if len(ids) % self.page_size == 0:
+            pages.append([0, 0])
+        ids.append(item_id)
+        pages[-1][0] += 1
+        pages[-1][1] += int(new)
+
+    def finish(self, key, resumed=False):
+        """
+        Keep the listing's IDs as the history for the next plan. A read resumed
+        partway down the listing keeps the old history, since its IDs do not
+        start at the top.
+        """
+        with self._lock:
+            ids = self._current.pop(key, None)
+            if not ids or resumed:
+                return
+            history = decode_ids(ids)
+            self.history[key] = history
+        if self.crawl_state is not None:
+            self.crawl_state.save_listing_history(key, history.tobytes())
+
+    def report(self):
+        """Per source: pages read, items, new items, new per call and the new count of each page"""
+        with self._lock:
+            return {
+                key: {
+                    'pages': len(pages),
+                    'items': sum(fetched for fetched, _ in pages),
+                    'new': sum(new for _, new in pages),
+                    'new_per_call': sum(new for _, new in pages) / len(pages) if pages else 0.0,
+                    'new_per_page': [new for _, new in pages]
+                }
+                for key, pages in self.pages.items()
+            }
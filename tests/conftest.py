@@ -0,0 +1,39 @@
+import importlib.util
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_scraper import load_main_module  # noqa: E402
+from fake_reddit import FakeReddit, VirtualClock  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def main_file():
+    return load_main_module()
+
+
+@pytest.fixture(scope='session')
+def data_cleaning():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data cleaning.py')
+    spec = importlib.util.spec_from_file_location('data_cleaning', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def make_scraper(main_file):
+    """Scraper on a fresh offline FakeReddit with a simulated clock"""
+    def make(num_posts=2000, latency=0.05, seed=0, **kwargs):
+        clock = VirtualClock()
+        reddit = FakeReddit(num_posts=num_posts, seed=seed, latency=latency, quota=100_000, clock=clock)
+        rate_limiter = AdaptiveRateLimiter(
+            limits=lambda: reddit.auth.limits, retry_on=main_file.RETRYABLE_ERRORS,
+            clock=clock.monotonic, wall_clock=clock.time, sleep=clock.sleep, rng=random.Random(seed))
+        return main_file.ImprovedRedditScraper(reddit=reddit, rate_limiter=rate_limiter, **kwargs)
+    return make
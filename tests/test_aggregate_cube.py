@@ -0,0 +1,21 @@
+import pandas as pd
+
+from aggregate_cube import AggregateCube
+
+
+def test_inferred_ages_are_a_separate_dimension():
+    posts = pd.DataFrame({
+        'post_id': ['a', 'b', 'c'],
+        'created_date': ['2025-01-01 10:00:00'] * 3,
+        'flair': ['Debt'] * 3,
+        'gender': ['Male', 'Male', 'Female'],
+        'age': [30, 40, 20],
+        'age_gender_inferred': [False, True, False],
+        'score': [1, 2, 3],
+        'num_comments': [0, 0, 0]
+    })
+    cube = AggregateCube()
+    cube.add(posts)
+    assert cube.value_counts('gender', known_age=True).to_dict() == {'Male': 2, 'Female': 1}
+    assert cube.value_counts('gender', known_age=True, inferred=False).to_dict() == {'Male': 1, 'Female': 1}
+    assert cube.age_range(inferred=False) == (20, 30)
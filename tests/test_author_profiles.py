@@ -0,0 +1,41 @@
+from author_profiles import SECONDS_PER_YEAR, AuthorProfileCache
+
+STATED = 1_700_000_000.0
+
+
+def comment(author, age, date):
+    return {'comment_author': author, 'comment_gender': 'Male' if age else None, 'comment_age': age,
+            'comment_created_date': date, 'comment_age_gender_inferred': False}
+
+
+def test_filled_records_are_flagged_as_inferred():
+    profiles = AuthorProfileCache(':memory:')
+    keys = ('comment_author', 'comment_gender', 'comment_age', 'comment_created_date',
+            'comment_age_gender_inferred')
+    stated = comment('alice', 30, '2024-01-01 00:00:00')
+    assert not profiles.fill(stated, *keys)
+    assert stated['comment_age_gender_inferred'] is False
+
+    later = comment('alice', None, '2026-06-01 00:00:00')
+    assert profiles.fill(later, *keys)
+    assert (later['comment_gender'], later['comment_age'], later['comment_age_gender_inferred']) == ('Male', 32, True)
+
+
+def test_resolved_ages_stay_in_the_extractor_range():
+    profiles = AuthorProfileCache(':memory:')
+    profiles.remember('young', 'Female', 17, STATED)
+    profiles.remember('old', 'Male', 79, STATED)
+    assert profiles.resolve('young', STATED) == ('Female', 17)
+    assert profiles.resolve('young', STATED - 3 * SECONDS_PER_YEAR) == (None, None)
+    assert profiles.resolve('old', STATED + 2.5 * SECONDS_PER_YEAR) == (None, None)
+
+
+def test_stated_counts_exclude_profile_fills(make_scraper):
+    scraper = make_scraper(author_profiles=AuthorProfileCache(':memory:'))
+    posts, comments = scraper.scrape_posts_and_comments(target_posts=300, comments_per_post=20)
+    frame = comments.to_frame()
+    inferred = frame['comment_age_gender_inferred']
+    assert inferred.sum() > 0 and frame.loc[inferred, 'comment_age'].between(16, 80).all()
+    assert scraper.comments_with_age_gender == (frame['comment_age'].notna() & ~inferred).sum()
+    assert scraper.posts_with_age_gender == (posts.to_frame()['age'].notna()
+                                             & ~posts.to_frame()['age_gender_inferred']).sum()
@@ -0,0 +1,41 @@
+import pandas as pd
+
+
+def test_id_keys_do_not_depend_on_the_rest_of_the_chunk(data_cleaning):
+    ids = data_cleaning.CompactIdSet()
+    assert ids.add_new(['abc', 'def']).tolist() == [True, True]
+    # A missing ID in the chunk used to switch every ID in it to hashing
+    assert ids.add_new(['abc', None]).tolist() == [False, True]
+    assert ids.add_new(pd.Series([None, 'def', 'ghi'], dtype='string')).tolist() == [False, False, True]
+
+
+def test_only_plain_base36_ids_are_decoded(data_cleaning):
+    ids = data_cleaning.CompactIdSet()
+    assert ids.add_new(['t1abc', 't1_abc', ' t1abc', 't1_abc']).tolist() == [True, True, True, False]
+    keys = data_cleaning.CompactIdSet.encode(['t1abc', 't1_abc', 'z' * 13])
+    assert keys[0] == int('t1abc', 36) and (keys[1:] < 0).all()
+
+
+def test_cleaning_a_partitioned_dataset_drops_the_partition_keys(make_scraper, data_cleaning, tmp_path):
+    scraper = make_scraper()
+    posts = scraper.scrape_multiple_sources(target_posts=200)
+    scraper.save_data(posts, filename_prefix=str(tmp_path / 'reddit'), format='parquet')
+    [dataset] = tmp_path.glob('reddit_posts_*')
+
+    output = str(tmp_path / 'clean_posts.parquet')
+    data_cleaning.clean_posts(str(dataset), output)
+    cleaned = pd.read_parquet(output)
+    assert len(cleaned) == 200
+    assert 'created_day' not in cleaned.columns and 'flair_partition' not in cleaned.columns
+
+
+def test_parquet_save_skips_posts_that_were_only_streamed(make_scraper, tmp_path):
+    scraper = make_scraper()
+    scraper.stream_to(str(tmp_path / 'stream'), format='parquet')
+    posts = scraper.scrape_multiple_sources(target_posts=200)
+    assert len(posts) == 200 and not scraper.keep_records
+
+    posts_df, _ = scraper.save_data(posts, filename_prefix=str(tmp_path / 'reddit'), format='parquet')
+    scraper.close_sinks()
+    assert posts_df is None and not list(tmp_path.glob('reddit_posts_*'))
+    assert len(pd.read_parquet(scraper.post_sink.path)) == 200
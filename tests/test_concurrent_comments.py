@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize('tree_calls', [None, 3])
+def test_concurrent_comments_match_serial(make_scraper, tree_calls):
+    """Worker threads over a client with latency return the serial loop's comments, in order"""
+    results = []
+    for max_workers in (1, 6):
+        scraper = make_scraper()
+        posts, comments = scraper.scrape_posts_and_comments(
+            target_posts=150, comments_per_post=40 if tree_calls else 5,
+            max_workers=max_workers, tree_calls=tree_calls)
+        results.append((posts.to_frame(), comments.to_frame(), scraper.total_comments_scraped))
+
+    (serial_posts, serial_comments, serial_total), (posts, comments, total) = results
+    assert len(serial_comments) > 0
+    assert serial_posts.equals(posts)
+    assert serial_comments.equals(comments)
+    assert serial_total == total
@@ -0,0 +1,126 @@
+import os
+
+from crawl_state import CrawlState
+
+
+ONLY_HOT = {name: 0 for name in ['new', 'top_week', 'top_month', 'top_year', 'top_all', 'rising',
+                                  'controversial_month']}
+
+
+def scrape(make_scraper, state_path, target_posts, source_weights=None, save=True):
+    state = CrawlState(str(state_path))
+    scraper = make_scraper(crawl_state=state)
+    posts = scraper.scrape_multiple_sources(target_posts=target_posts, source_weights=source_weights)
+    if save:
+        # Commits the crawl state once the records are on disk
+        scraper.save_data(posts, filename_prefix=str(state_path.parent / 'reddit'))
+    cursors = dict(state._conn.execute('SELECT source, consumed FROM cursors'))
+    state.close()
+    return [post['post_id'] for post in posts], cursors, scraper.reddit.total_requests
+
+
+def test_finished_listings_are_read_again_next_run(make_scraper, tmp_path):
+    state_path = tmp_path / 'state.sqlite'
+    first, cursors, _ = scrape(make_scraper, state_path, target_posts=10_000)
+    assert first and cursors == {}
+
+    second, cursors, requests = scrape(make_scraper, state_path, target_posts=10_000)
+    # Everything was seen, but the listings are still read rather than skipped
+    assert second == [] and cursors == {}
+    assert requests > 8
+
+
+def test_interrupted_read_resumes_where_it_stopped(make_scraper, tmp_path):
+    state_path = tmp_path / 'state.sqlite'
+    first, cursors, _ = scrape(make_scraper, state_path, target_posts=250)
+    assert len(first) == 250
+    assert cursors == {'personalfinance/hot': 250}
+
+    # The planner lets hot read one page past last run's 250 items, to 400
+    second, cursors, requests = scrape(make_scraper, state_path, target_posts=250, source_weights=ONLY_HOT)
+    assert len(second) == 150 and not set(first) & set(second)
+    assert cursors == {}
+    # One 'about' request plus the pages after the cursor, not the first pages again
+    assert requests == 1 + 2
+
+
+def test_closing_without_saving_keeps_the_posts_for_next_run(make_scraper, tmp_path):
+    state_path = tmp_path / 'state.sqlite'
+    first, _, _ = scrape(make_scraper, state_path, target_posts=250, save=False)
+    assert len(first) == 250
+    assert committed_seen(state_path) == set()
+
+    second, _, _ = scrape(make_scraper, state_path, target_posts=250)
+    assert second == first
+
+
+def test_reset_cursors_leaves_seen_ids_uncommitted(tmp_path):
+    state_path = str(tmp_path / 'state.sqlite')
+    state = CrawlState(state_path)
+    state.set_cursor('personalfinance/hot', 't3_abc', 100)
+    state.checkpoint()
+    state.mark_seen('post', ['abc'])
+    state.reset_cursors()
+    state.close()
+
+    reopened = CrawlState(state_path)
+    assert reopened.seen_ids('post') == set()
+    assert reopened.get_cursor('personalfinance/hot') == ('t3_abc', 100)
+
+
+def committed_seen(state_path):
+    """Seen post IDs another process would find in the state file"""
+    return CrawlState(str(state_path)).seen_ids('post')
+
+
+def test_seen_ids_wait_for_save_data_without_sinks(make_scraper, tmp_path):
+    state_path = tmp_path / 'state.sqlite'
+    scraper = make_scraper(crawl_state=CrawlState(str(state_path)))
+    posts = scraper.scrape_multiple_sources(target_posts=300)
+    assert len(posts) == 300
+    # Progress checkpoints ran, but the records are only in memory
+    assert committed_seen(state_path) == set()
+
+    scraper.save_data(posts, filename_prefix=str(tmp_path / 'reddit'))
+    assert committed_seen(state_path) == {post['post_id'] for post in posts}
+
+
+def test_seen_ids_commit_at_checkpoints_when_streaming(make_scraper, tmp_path):
+    state_path = tmp_path / 'state.sqlite'
+    scraper = make_scraper(crawl_state=CrawlState(str(state_path)))
+    scraper.stream_to(str(tmp_path / 'reddit'))
+    scraper.scrape_multiple_sources(target_posts=300)
+    scraper.close_sinks()
+    assert len(committed_seen(state_path)) == 300
+
+
+def test_checkpoints_never_commit_posts_still_in_the_pipeline(make_scraper, tmp_path, monkeypatch):
+    """Another loop sharing the scraper (as under the scheduler) may checkpoint at any moment"""
+    import pandas as pd
+    from post_pipeline import PostPipeline, PostStream
+
+    state_path = tmp_path / 'state.sqlite'
+    state = CrawlState(str(state_path))
+    with PostPipeline(workers=2, batch_size=20, max_pending=4, processes=False) as pipeline:
+        scraper = make_scraper(crawl_state=state, post_pipeline=pipeline)
+        scraper.stream_to(str(tmp_path / 'reddit'), flush_every=10_000)
+
+        put = PostStream.put
+        in_flight, unwritten = [], set()
+
+        def put_then_checkpoint(stream, raw):
+            # Errors raised in here would be logged and skipped by the scrape loop, so collect them
+            ready = put(stream, raw)
+            scraper.checkpoint()
+            path = scraper.post_sink.path
+            written = set(pd.read_csv(path, dtype=str)['post_id']) if os.path.exists(path) else set()
+            unwritten.update(committed_seen(state_path) - written)
+            in_flight.append(stream.in_flight)
+            return ready
+
+        monkeypatch.setattr(PostStream, 'put', put_then_checkpoint)
+        posts = scraper.scrape_multiple_sources(target_posts=300)
+        scraper.close_sinks()
+    assert max(in_flight) > 0
+    assert unwritten == set()
+    assert committed_seen(state_path) == {post['post_id'] for post in posts}
@@ -0,0 +1,19 @@
+from crawl_state import CrawlState
+
+
+def test_watermark_commits_only_after_the_posts_are_saved(make_scraper, tmp_path):
+    state_path = str(tmp_path / 'state.sqlite')
+    scraper = make_scraper(crawl_state=CrawlState(state_path))
+    posts, _ = scraper.scrape_incremental(new_limit=200)
+    assert len(posts) == 200
+    assert CrawlState(state_path).get_watermark('personalfinance/new') == (None, None)
+
+    scraper.save_data(posts, filename_prefix=str(tmp_path / 'reddit'))
+    assert CrawlState(state_path).get_watermark('personalfinance/new')[1] == posts[0]['post_id']
+
+
+def test_without_crawl_state_the_scraper_keeps_none(make_scraper):
+    scraper = make_scraper()
+    posts, refreshed = scraper.scrape_incremental(new_limit=100)
+    assert len(posts) == 100 and refreshed == []
+    assert scraper.crawl_state is None
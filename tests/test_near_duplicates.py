@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import near_duplicates
+from near_duplicates import NearDuplicateIndex, _SortedRuns
+
+WORDS = ("budget emergency fund roth ira index funds mortgage refinance credit card debt salary raise "
+         "rent savings account interest rate car loan student loans retirement match employer").split()
+
+
+def text(seed, words=40):
+    rng = np.random.default_rng(seed)
+    return ' '.join(rng.choice(WORDS, words))
+
+
+def test_matches_return_every_entry_with_the_key():
+    runs = _SortedRuns('test')
+    runs.add(np.array([5, 5, 7, 5], dtype=np.uint64), np.array([0, 1, 2, 3]))
+    queries, values = runs.matches(np.array([5, 6, 7], dtype=np.uint64))
+    assert sorted(zip(queries.tolist(), values.tolist())) == [(0, 0), (0, 1), (0, 3), (2, 2)]
+
+
+def test_reposts_join_the_oldest_posts_cluster(tmp_path):
+    with NearDuplicateIndex(str(tmp_path)) as index:
+        index.assign(['100000', '100001'], [text(1), text(2)])
+    with NearDuplicateIndex(str(tmp_path)) as index:
+        repost = text(1) + ' edit thanks'
+        assert index.assign(['100005', '100006'], [repost, text(3)]).tolist() == ['100000', '100006']
+
+
+def test_interrupted_flush_leaves_a_loadable_index(tmp_path, monkeypatch):
+    index = NearDuplicateIndex(str(tmp_path))
+    for batch in range(4):
+        ids = [f"{36 ** 5 + batch * 10 + i:x}" for i in range(10)]
+        index.assign(ids, [text(batch * 10 + i) for i in range(10)])
+        index.flush()
+    rows = len(index)
+
+    # The next batch merges runs; crash before meta.json is replaced
+    index.assign([f"{36 ** 5 + 90 + i:x}" for i in range(40)], [text(90 + i) for i in range(40)])
+
+    def crash(*args):
+        raise OSError('crashed')
+    monkeypatch.setattr(near_duplicates.os, 'replace', crash)
+    with pytest.raises(OSError):
+        index.flush()
+    monkeypatch.undo()
+
+    reopened = NearDuplicateIndex(str(tmp_path))
+    assert len(reopened) == rows
+    assert reopened.assign(['a0'], [text(0)]).tolist() == [f"{36 ** 5:x}"]
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+from prawcore.exceptions import TooManyRequests
+
+from fake_reddit import VirtualClock, _RateLimitedResponse
+from rate_limiter import AdaptiveRateLimiter
+
+
+class Flaky:
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError('flaky')
+        return 'ok'
+
+
+def make_limiter(**kwargs):
+    clock = VirtualClock()
+    return AdaptiveRateLimiter(limits=lambda: {'remaining': 100, 'used': 500}, retry_on=(ConnectionError,),
+                               clock=clock.monotonic, wall_clock=clock.time, sleep=clock.sleep,
+                               rng=random.Random(0), **kwargs)
+
+
+def test_retries_acquire_a_slot_each():
+    limiter = make_limiter()
+    func = Flaky(failures=2)
+    assert limiter.call(func) == 'ok'
+    assert func.attempts == 3
+    assert limiter.retries == 2
+    # The first attempt's slot is acquired by the caller
+    assert limiter.calls == 2
+
+
+def test_gives_up_after_max_retries():
+    limiter = make_limiter(max_retries=1)
+    with pytest.raises(ConnectionError):
+        limiter.call(Flaky(failures=5))
+    assert limiter.calls == 1
+
+
+def test_listing_resumes_after_a_rejected_page(make_scraper):
+    scraper = make_scraper()
+    reddit = scraper.reddit
+    request = reddit._request
+
+    def reject_third_page(endpoint):
+        if endpoint == 'listing' and reddit.requests['listing'] == 2 and not reddit.requests['rejected']:
+            reddit.requests['rejected'] += 1
+            raise TooManyRequests(_RateLimitedResponse(30))
+        request(endpoint)
+
+    reddit._request = reject_third_page
+    posts = scraper.scrape_with_pagination(target_posts=500)
+    assert reddit.requests['rejected'] == 1
+    # The retried page picks up where the rejected request left off
+    expected = make_scraper().scrape_with_pagination(target_posts=500)
+    assert [post['post_id'] for post in posts] == [post['post_id'] for post in expected]
+    assert len(posts) == 500
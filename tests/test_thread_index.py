@@ -0,0 +1,50 @@
+import pandas as pd
+
+from reddit_ids import decode_ids
+from source_planner import IdBitmap
+from thread_index import build_thread_index
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def test_invalid_ids_get_the_fallback_key():
+    keys = decode_ids(['abc', '', None, 't1_abc', 'ABC', 'z' * 13, ' abc'])
+    assert keys.tolist() == [int('abc', 36)] + [-1] * 6
+    bitmap = IdBitmap(['abc', 't1_abc', 'z' * 13])
+    assert len(bitmap) == 3 and 'z' * 13 in bitmap
+
+
+def test_bad_comment_ids_do_not_abort_the_build(tmp_path):
+    posts = write_csv(tmp_path / 'posts.csv', {'post_id': ['p1', 'p2']})
+    comments = write_csv(tmp_path / 'comments.csv', {
+        'comment_id': ['c1', 'not-an-id', 'z' * 13, 'c2'],
+        'post_id': ['p1', 'p1', 'p2', 'p2'],
+        'comment_parent_id': ['p1', 'c1', 'p2', 'c2!'],
+    })
+    index = build_thread_index(posts, comments, str(tmp_path / 'index'))
+    assert index.num_posts == 2 and index.num_comments == 2
+    assert index.comments_for_post('p1') == ['c1']
+
+
+def test_comments_with_a_missing_parent_are_orphans(tmp_path):
+    posts = write_csv(tmp_path / 'posts.csv', {'post_id': ['100nvk0']})
+    comments = write_csv(tmp_path / 'comments.csv', {
+        'comment_id': ['100nvka', '100nvkb', '100nvkh', '100nvki', '100nvkj'],
+        'post_id': ['100nvk0'] * 5,
+        # 100nvkg is not in the cleaned data
+        'comment_parent_id': ['100nvk0', '100nvka', '100nvkg', '100nvkh', None],
+    })
+    index = build_thread_index(posts, comments, str(tmp_path / 'index'))
+
+    assert index.children('100nvk0') == ['100nvka']
+    assert index.parent_id('100nvkh') == '100nvkg'
+    assert index.is_orphan('100nvkh') and not index.is_orphan('100nvki')
+    assert index.parent_id('100nvkj') is None
+    # Replies to an orphan are still linked to it, and depth counts from the post
+    assert index.children('100nvkh') == ['100nvki']
+    assert index.parent_id('100nvki') == '100nvkh'
+    assert [index.reply_depth(c) for c in ('100nvka', '100nvkb', '100nvkh', '100nvki')] == [1, 2, 1, 2]
+    assert sorted(index.comments_for_post('100nvk0')) == ['100nvka', '100nvkb', '100nvkh', '100nvki', '100nvkj']
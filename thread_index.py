@@ -0,0 +1,237 @@
+"""
+Memory-mapped index linking comments to their posts and parent comments.
+
+Built once from the cleaned posts and comments files (CSV or Parquet),
+reading only the ID columns. Posts and comments become integer nodes: posts
+are 0..P-1 and comments P..P+C-1, each in base36-ID order. The index stores
+parent, depth and descendant-count arrays plus two CSR (offset + index) layouts:
+the direct children of every node, and every comment of a post. A comment
+whose parent comment is not in the data is an orphan: it hangs off its post
+for depth and thread queries, but is nobody's child, and its recorded parent
+ID is kept so parent_id() still reports the real parent. All arrays
+are .npy files opened with mmap_mode='r', so queries touch only the pages
+they need:
+
+- comments_for_post / children: O(log n) lookup + O(k) slice
+- reply_depth / subtree_size:   O(log n) lookup + O(1) read
+
+Usage: python thread_index.py <cleaned_posts> <cleaned_comments> <index_dir>
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from reddit_ids import decode_id, decode_ids, encode_id
+
+INDEX_ARRAYS = (
+    'post_keys', 'comment_keys', 'parent', 'parent_keys', 'orphan', 'depth', 'descendants',
+    'child_offsets', 'child_nodes', 'thread_offsets', 'thread_nodes'
+)
+
+
+def _read_id_columns(path, columns, chunksize):
+    """Yield chunks holding only the requested ID columns that exist in the file"""
+    if path.endswith('.parquet') or os.path.isdir(path):
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        present = [column for column in columns if column in dataset.schema.names]
+        for batch in dataset.to_batches(columns=present, batch_size=chunksize):
+            yield batch.to_pandas().astype(object)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        present = [column for column in columns if column in header]
+        yield from pd.read_csv(path, usecols=present, dtype=str, chunksize=chunksize)
+
+
+def _csr(groups, count):
+    """Offsets and member nodes for grouping the nodes in `groups` (-1 = none) into `count` buckets"""
+    members = np.flatnonzero(groups >= 0)
+    members = members[np.argsort(groups[members], kind='stable')]
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups[members], minlength=count), out=offsets[1:])
+    return offsets, members.astype(np.int32)
+
+
+def build_thread_index(posts_path, comments_path, index_dir, chunksize=200_000):
+    """Build the index files in index_dir and return an opened ThreadIndex"""
+    post_parts = [decode_ids(chunk['post_id'])
+                  for chunk in _read_id_columns(posts_path, ['post_id'], chunksize)]
+
+    comment_parts, comment_post_parts, parent_parts = [], [], []
+    columns = ['comment_id', 'post_id', 'comment_parent_id']
+    for chunk in _read_id_columns(comments_path, columns, chunksize):
+        comment_parts.append(decode_ids(chunk['comment_id']))
+        comment_post_parts.append(decode_ids(chunk['post_id']))
+        parents = chunk['comment_parent_id'] if 'comment_parent_id' in chunk else [None] * len(chunk)
+        parent_parts.append(decode_ids(parents))
+
+    empty = np.empty(0, dtype=np.int64)
+    comment_ids = np.concatenate(comment_parts) if comment_parts else empty
+    comment_posts = np.concatenate(comment_post_parts) if comment_post_parts else empty
+    parent_ids = np.concatenate(parent_parts) if parent_parts else empty
+
+    # One node per comment ID, keeping the first row of any duplicate; rows
+    # without a comment or post ID cannot be placed in a thread
+    comment_keys, first_rows = np.unique(comment_ids, return_index=True)
+    comment_posts = comment_posts[first_rows]
+    parent_ids = parent_ids[first_rows]
+    placeable = (comment_keys >= 0) & (comment_posts >= 0)
+    comment_keys, comment_posts, parent_ids = (
+        comment_keys[placeable], comment_posts[placeable], parent_ids[placeable])
+
+    # Posts referenced only by comments still get a node
+    post_keys = np.unique(np.concatenate(post_parts + [comment_posts]))
+    post_keys = post_keys[post_keys >= 0]
+    num_posts, num_comments = len(post_keys), len(comment_keys)
+    num_nodes = num_posts + num_comments
+
+    # Parent node: the parent comment if it is indexed, otherwise the post.
+    # A comment whose parent is neither (missing from the data, or unknown) is
+    # an orphan; it still hangs off the post so its depth and thread are known
+    post_nodes = np.searchsorted(post_keys, comment_posts)
+    parent_positions = np.searchsorted(comment_keys, parent_ids).clip(max=max(num_comments - 1, 0))
+    is_top_level = parent_ids == comment_posts
+    has_comment_parent = ((parent_ids >= 0) & ~is_top_level
+                          & (comment_keys[parent_positions] == parent_ids))
+    orphan = ~is_top_level & ~has_comment_parent
+    parent = np.full(num_nodes, -1, dtype=np.int64)
+    parent[num_posts:] = np.where(has_comment_parent, num_posts + parent_positions, post_nodes)
+
+    # Depth and root post by pointer doubling: O(n log depth)
+    jump = np.where(parent >= 0, parent, np.arange(num_nodes))
+    depth = (parent >= 0).astype(np.int64)
+    for _ in range(64):
+        if np.array_equal(jump, jump[jump]):
+            break
+        depth = depth + depth[jump]
+        jump = jump[jump]
+    root = jump
+
+    # Descendant counts, accumulated from the deepest level upwards
+    descendants = np.zeros(num_nodes, dtype=np.int64)
+    by_depth = np.argsort(-depth, kind='stable')
+    level_starts = np.flatnonzero(np.diff(depth[by_depth], prepend=-1) != 0)
+    for start, end in zip(level_starts, list(level_starts[1:]) + [num_nodes]):
+        nodes = by_depth[start:end]
+        nodes = nodes[parent[nodes] >= 0]
+        np.add.at(descendants, parent[nodes], descendants[nodes] + 1)
+
+    # Orphans are nobody's child: their real parent is not in the index
+    child_groups = parent.copy()
+    child_groups[num_posts:][orphan] = -1
+    child_offsets, child_nodes = _csr(child_groups, num_nodes)
+
+    # Comments of each post, ordered by depth so top-level replies come first
+    thread_order = np.lexsort((depth[num_posts:], root[num_posts:]))
+    thread_offsets = np.zeros(num_posts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(root[num_posts:], minlength=num_posts), out=thread_offsets[1:])
+    thread_nodes = (num_posts + thread_order).astype(np.int32)
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {
+        'post_keys': post_keys,
+        'comment_keys': comment_keys,
+        'parent': parent.astype(np.int32),
+        'parent_keys': parent_ids,
+        'orphan': orphan,
+        'depth': depth.astype(np.int32),
+        'descendants': descendants.astype(np.int32),
+        'child_offsets': child_offsets,
+        'child_nodes': child_nodes,
+        'thread_offsets': thread_offsets,
+        'thread_nodes': thread_nodes
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(index_dir, f"{name}.npy"), array)
+    with open(os.path.join(index_dir, 'meta.json'), 'w') as f:
+        json.dump({'num_posts': int(num_posts), 'num_comments': int(num_comments)}, f)
+
+    return ThreadIndex(index_dir)
+
+
+class ThreadIndex:
+    """Read-only, memory-mapped view of an index built by build_thread_index"""
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.num_posts = meta['num_posts']
+        self.num_comments = meta['num_comments']
+        for name in INDEX_ARRAYS:
+            setattr(self, name, np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode='r'))
+
+    @staticmethod
+    def _find(keys, item_id):
+        key = decode_id(item_id)
+        if key < 0:
+            raise KeyError(item_id)
+        position = int(np.searchsorted(keys, key))
+        if position >= len(keys) or keys[position] != key:
+            raise KeyError(item_id)
+        return position
+
+    def post_node(self, post_id):
+        return self._find(self.post_keys, post_id)
+
+    def comment_node(self, comment_id):
+        return self.num_posts + self._find(self.comment_keys, comment_id)
+
+    def node_id(self, node):
+        """The base36 ID of a node"""
+        if node < self.num_posts:
+            return encode_id(self.post_keys[node])
+        return encode_id(self.comment_keys[node - self.num_posts])
+
+    def _node(self, item_id):
+        """Node for a comment ID, falling back to a post ID"""
+        try:
+            return self.comment_node(item_id)
+        except KeyError:
+            return self.post_node(item_id)
+
+    def comments_for_post(self, post_id):
+        """IDs of every comment in a post's thread, top-level replies first"""
+        node = self.post_node(post_id)
+        nodes = self.thread_nodes[self.thread_offsets[node]:self.thread_offsets[node + 1]]
+        return [self.node_id(n) for n in nodes]
+
+    def children(self, item_id):
+        """IDs of the direct replies to a post or comment; orphans are nobody's replies"""
+        node = self._node(item_id)
+        nodes = self.child_nodes[self.child_offsets[node]:self.child_offsets[node + 1]]
+        return [self.node_id(n) for n in nodes]
+
+    def parent_id(self, comment_id):
+        """
+        ID of the comment or post a comment replies to. For an orphan this is
+        the recorded parent, which is not in the index, or None if unknown.
+        """
+        node = self.comment_node(comment_id)
+        if self.orphan[node - self.num_posts]:
+            key = self.parent_keys[node - self.num_posts]
+            return encode_id(key) if key >= 0 else None
+        return self.node_id(self.parent[node])
+
+    def is_orphan(self, comment_id):
+        """True if the comment's parent comment is not in the index"""
+        return bool(self.orphan[self.comment_node(comment_id) - self.num_posts])
+
+    def reply_depth(self, comment_id):
+        """1 for a top-level comment, 2 for a reply to it, and so on"""
+        return int(self.depth[self.comment_node(comment_id)])
+
+    def subtree_size(self, item_id):
+        """Number of comments below a post or comment"""
+        return int(self.descendants[self._node(item_id)])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print(__doc__)
+        sys.exit(1)
+    index = build_thread_index(*sys.argv[1:4])
+    print(f"Indexed {index.num_posts:,} posts and {index.num_comments:,} comments into {sys.argv[3]}")